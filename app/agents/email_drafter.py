@@ -1,5 +1,6 @@
 from app.models import Lead
 from app.services.llm_service import llm_service
+from app.services.token_budget import TokenBudgetExceeded
 
 
 EMAIL_SYSTEM_PROMPT = """You are a professional sales copywriter. Write short, personalized cold outreach emails.
@@ -14,6 +15,9 @@ Guidelines:
 
 Write ONLY the email body. No subject line, no signature, no explanations."""
 
+# Pitch line of the template used when drafting fails
+FALLBACK_PITCH = "I'd love to share how our AI-powered CRM solution could help your team work more efficiently."
+
 
 class EmailDrafter:
     async def draft_email(self, lead: Lead, product_description: str = None) -> Lead:
@@ -35,15 +39,17 @@ Product/Service: {product_desc}
 Write a short, personalized email that would resonate with this specific person."""
 
         try:
-            response = await llm_service.generate(prompt, EMAIL_SYSTEM_PROMPT)
+            response = await llm_service.generate(prompt, EMAIL_SYSTEM_PROMPT, call_type="draft")
             lead.email_draft = response.strip()
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Email drafting error for lead {lead.id}: {e}")
             lead.email_draft = f"""Hi {lead.name},
 
 I came across {lead.company or 'your company'} and was impressed by what you're building in the {lead.industry or 'industry'} space.
 
-I'd love to share how our AI-powered CRM solution could help your team work more efficiently. Would you be open to a brief chat?
+{FALLBACK_PITCH} Would you be open to a brief chat?
 
 Best regards"""
         
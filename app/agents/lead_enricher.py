@@ -1,6 +1,13 @@
-import json
+import asyncio
+import re
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from pydantic import BaseModel
 from app.models import Lead
+from app.config import settings
+from app.agents.rule_scorer import SENIORITY_RULES
 from app.services.llm_service import llm_service
+from app.services.token_budget import TokenBudgetExceeded
 
 
 ENRICHMENT_SYSTEM_PROMPT = """You are a sales intelligence expert. Analyze leads and create buyer personas.
@@ -18,51 +25,147 @@ Respond ONLY with valid JSON in this exact format:
 }"""
 
 
+class EnrichmentReply(BaseModel):
+    """Expected reply to ENRICHMENT_SYSTEM_PROMPT."""
+    persona: str
+    enriched_industry: Optional[str] = None
+    enriched_company_size: Optional[str] = None
+
+
+DEFAULT_PERSONA = "Business professional seeking solutions to improve operations."
+
+# Lead fields enrich fills in when they are missing
+FILLED_FIELDS = ("industry", "company_size")
+
+# (function name, regex on lowercased job title); first match wins
+FUNCTION_RULES = [
+    ("executive", r"\b(?:ceo|founder|co-founder|(?<!vice )(?<!vice-)president|owner|general manager|managing partner)\b"),
+    ("engineering", r"engineer|developer|\bcto\b|technolog|technical|architect"),
+    ("it", r"\bit\b|information|\bcio\b|security|\bciso\b|infrastructure"),
+    ("product", r"product"),
+    ("sales", r"sales|revenue|business development|account|\bcro\b"),
+    ("marketing", r"marketing|brand|growth|\bcmo\b|communications"),
+    ("finance", r"financ|\bcfo\b|accounting|controller|treasur"),
+    ("operations", r"operations|\bcoo\b|supply|logistics|procurement"),
+    ("people", r"\bhr\b|human resources|people|talent|recruit"),
+]
+_FUNCTION_PATTERNS = [(name, re.compile(pattern)) for name, pattern in FUNCTION_RULES]
+_SENIORITY_PATTERNS = [(label, re.compile(pattern)) for pattern, _, label in SENIORITY_RULES]
+
+GroupKey = Tuple[str, str, str]
+
+
+def title_family(job_title: Optional[str]) -> str:
+    """Collapse a job title to 'seniority/function', e.g. 'VP/Head/sales'."""
+    title = (job_title or "").lower()
+    if not title.strip():
+        return "unknown"
+    seniority = next((label for label, p in _SENIORITY_PATTERNS if p.search(title)), "IC")
+    function = next((name for name, p in _FUNCTION_PATTERNS if p.search(title)), "general")
+    return f"{seniority}/{function}"
+
+
+def _normalize(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().split())
+
+
 class LeadEnricher:
-    async def enrich_lead(self, lead: Lead) -> Lead:
-        """Enrich a lead with persona and missing details."""
-        prompt = f"""Create a buyer persona for this lead:
+    """Creates personas per (company, industry, title family) group.
+
+    Leads in the same group share one LLM call; the company-level facts
+    (industry, size) and the persona are cached and fanned out to every
+    matching lead. Concurrent requests for a group that is already being
+    enriched wait for that call instead of starting another one.
+    """
+
+    def __init__(self, max_groups: Optional[int] = None):
+        self.max_groups = max_groups or settings.enrichment_cache_size
+        self._personas: "OrderedDict[GroupKey, str]" = OrderedDict()
+        self._companies: "OrderedDict[str, Tuple[Optional[str], Optional[str]]]" = OrderedDict()
+        self._inflight: Dict[GroupKey, asyncio.Future] = {}
+
+    def group_key(self, lead: Lead) -> GroupKey:
+        return (_normalize(lead.company), _normalize(lead.industry), title_family(lead.job_title))
+
+    def _remember(self, cache: OrderedDict, key, value) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_groups:
+            cache.popitem(last=False)
+
+    def _apply(self, lead: Lead, persona: str) -> Lead:
+        lead.persona = persona
+
+        # Fill in missing fields from the company-level facts
+        industry, company_size = self._companies.get(_normalize(lead.company), (None, None))
+        if not lead.industry and industry:
+            lead.industry = industry
+        if not lead.company_size and company_size:
+            lead.company_size = company_size
+        return lead
+
+    async def _enrich_group(self, lead: Lead) -> Optional[str]:
+        """One LLM call for the group ``lead`` belongs to. Returns the persona."""
+        prompt = f"""Create a buyer persona for a typical person in this role:
 
-Name: {lead.name}
-Email: {lead.email}
 Company: {lead.company or 'Unknown'}
 Job Title: {lead.job_title or 'Unknown'}
 Industry: {lead.industry or 'Unknown'}
 Company Size: {lead.company_size or 'Unknown'}
-Location: {lead.location or 'Unknown'}
 
 Create a helpful buyer persona and fill in any missing industry/company size based on context clues."""
 
         try:
-            response = await llm_service.generate_json(prompt, ENRICHMENT_SYSTEM_PROMPT)
-            
-            # Clean response
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            response = response.strip()
-            
-            data = json.loads(response)
-            
-            lead.persona = data.get("persona", "")
-            
-            # Fill in missing fields if provided
-            if not lead.industry and data.get("enriched_industry"):
-                lead.industry = data.get("enriched_industry")
-            if not lead.company_size and data.get("enriched_company_size"):
-                lead.company_size = data.get("enriched_company_size")
-                
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error for lead {lead.id}: {e}")
-            lead.persona = "Business professional seeking solutions to improve operations."
+            reply = await llm_service.generate_json(
+                prompt, ENRICHMENT_SYSTEM_PROMPT, schema=EnrichmentReply, call_type="enrich"
+            )
+
+            company = _normalize(lead.company)
+            if company and company not in self._companies:
+                self._remember(self._companies, company, (
+                    lead.industry or reply.enriched_industry,
+                    lead.company_size or reply.enriched_company_size,
+                ))
+            return reply.persona
+
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Enrichment error for lead {lead.id}: {e}")
-            lead.persona = "Business professional seeking solutions to improve operations."
-        
-        return lead
+        return None
+
+    async def enrich_lead(self, lead: Lead) -> Lead:
+        """Enrich a lead with persona and missing details."""
+        key = self.group_key(lead)
+
+        if key in self._personas:
+            self._personas.move_to_end(key)
+            return self._apply(lead, self._personas[key])
+
+        # Single-flight: join the call already running for this group
+        if key in self._inflight:
+            persona = await asyncio.shield(self._inflight[key])
+            return self._apply(lead, persona or DEFAULT_PERSONA)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        persona = None
+        try:
+            persona = await self._enrich_group(lead)
+            if persona:
+                self._remember(self._personas, key, persona)
+        except TokenBudgetExceeded as e:
+            # Joined callers fail too instead of taking the default persona
+            future.set_exception(e)
+            future.exception()  # retrieved, even if nobody joined
+            raise
+        finally:
+            if not future.done():
+                future.set_result(persona)
+            del self._inflight[key]
+
+        return self._apply(lead, persona or DEFAULT_PERSONA)
 
 
 # Singleton instance
-lead_enricher = LeadEnricher()
\ No newline at end of file
+lead_enricher = LeadEnricher()
@@ -1,7 +1,9 @@
-import json
-from typing import Optional
+import asyncio
+from typing import Any, List
+from pydantic import BaseModel, Field, ValidationError, model_validator
 from app.models import Lead, LeadPriority
-from app.services.llm_service import llm_service
+from app.services.llm_service import llm_service, max_tokens_for
+from app.services.token_budget import TokenBudgetExceeded
 
 
 SCORING_SYSTEM_PROMPT = """You are a sales lead scoring expert. Analyze leads and assign priority scores.
@@ -20,52 +22,145 @@ Respond ONLY with valid JSON in this exact format:
 }"""
 
 
-class LeadScorer:
-    async def score_lead(self, lead: Lead) -> Lead:
-        """Score a single lead using AI."""
-        prompt = f"""Score this sales lead:
+BATCH_SCORING_SYSTEM_PROMPT = """You are a sales lead scoring expert. Analyze leads and assign priority scores.
+
+Consider these factors:
+- Job title seniority (C-level, VP, Director = higher priority)
+- Company size (larger = higher budget potential)
+- Industry fit (Technology, Healthcare, Finance = typically higher value)
+- Decision-making authority based on role
+
+You will receive several leads, each with an ID. Score every lead independently.
+
+Respond ONLY with valid JSON holding one object per lead, in this exact format:
+{
+    "scores": [
+        {
+            "id": <lead ID>,
+            "priority": "high" | "medium" | "low",
+            "priority_score": <number 1-100>,
+            "priority_reason": "<brief explanation>"
+        }
+    ]
+}"""
+
+
+# priority_reason of the default score written when scoring fails
+FALLBACK_REASON = "Auto-scored due to processing error"
+
+
+class ScoreReply(BaseModel):
+    """Expected reply to SCORING_SYSTEM_PROMPT."""
+    priority: LeadPriority
+    priority_score: int = Field(ge=1, le=100)
+    priority_reason: str = ""
+
+
+class BatchScore(ScoreReply):
+    id: int
+
+
+class BatchScoreReply(BaseModel):
+    """Expected reply to BATCH_SCORING_SYSTEM_PROMPT.
+    
+    Items are left raw and validated one by one as BatchScore, so a single
+    bad entry does not throw away the rest of the batch.
+    """
+    scores: List[Any]
+
+    @model_validator(mode="before")
+    @classmethod
+    def _accept_bare_list(cls, data):
+        # Some models drop the wrapper object and answer with the array
+        return {"scores": data} if isinstance(data, list) else data
 
-Name: {lead.name}
+
+def _describe_lead(lead: Lead) -> str:
+    return f"""Name: {lead.name}
 Email: {lead.email}
 Company: {lead.company or 'Unknown'}
 Job Title: {lead.job_title or 'Unknown'}
 Industry: {lead.industry or 'Unknown'}
 Company Size: {lead.company_size or 'Unknown'}
-Location: {lead.location or 'Unknown'}
+Location: {lead.location or 'Unknown'}"""
+
+
+class LeadScorer:
+    async def score_lead(self, lead: Lead) -> Lead:
+        """Score a single lead using AI."""
+        prompt = f"""Score this sales lead:
+
+{_describe_lead(lead)}
 
 Provide priority score and reasoning."""
 
         try:
-            response = await llm_service.generate_json(prompt, SCORING_SYSTEM_PROMPT)
-            
-            # Clean response - remove markdown if present
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            response = response.strip()
+            reply = await llm_service.generate_json(
+                prompt, SCORING_SYSTEM_PROMPT, schema=ScoreReply, call_type="score"
+            )
+            lead.priority = reply.priority.value
+            lead.priority_score = reply.priority_score
+            lead.priority_reason = reply.priority_reason
             
-            data = json.loads(response)
-            
-            lead.priority = data.get("priority", "medium")
-            lead.priority_score = data.get("priority_score", 50)
-            lead.priority_reason = data.get("priority_reason", "")
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error for lead {lead.id}: {e}")
-            print(f"Raw response: {response}")
-            # Default scoring on error
-            lead.priority = LeadPriority.MEDIUM
-            lead.priority_score = 50
-            lead.priority_reason = "Auto-scored due to processing error"
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Scoring error for lead {lead.id}: {e}")
             lead.priority = LeadPriority.MEDIUM
             lead.priority_score = 50
-            lead.priority_reason = "Auto-scored due to processing error"
+            lead.priority_reason = FALLBACK_REASON
         
         return lead
+    
+    async def score_leads(self, leads: List[Lead]) -> List[Lead]:
+        """Score several leads with a single LLM call.
+        
+        The shared rubric is sent once for the whole batch. Leads missing
+        from the reply, or with an invalid score, are re-scored one at a
+        time with score_lead.
+        """
+        if len(leads) <= 1:
+            return [await self.score_lead(lead) for lead in leads]
+        
+        leads_text = "\n\n".join(f"Lead ID: {lead.id}\n{_describe_lead(lead)}" for lead in leads)
+        prompt = f"""Score these {len(leads)} sales leads:
+
+{leads_text}
+
+Provide a priority score and reasoning for every lead ID."""
+        
+        results = {}
+        try:
+            reply = await llm_service.generate_json(
+                prompt, BATCH_SCORING_SYSTEM_PROMPT, schema=BatchScoreReply,
+                call_type="score_batch", max_tokens=max_tokens_for("score_batch", len(leads))
+            )
+            for raw in reply.scores:
+                try:
+                    item = BatchScore.model_validate(raw)
+                except ValidationError as e:
+                    print(f"Invalid batch score entry {raw!r}: {e.error_count()} error(s)")
+                    continue
+                results[item.id] = item
+        except TokenBudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"Batch scoring error for {len(leads)} leads: {e}")
+        
+        fallback = []
+        for lead in leads:
+            item = results.get(lead.id)
+            if item is None:
+                fallback.append(lead)
+                continue
+            lead.priority = item.priority.value
+            lead.priority_score = item.priority_score
+            lead.priority_reason = item.priority_reason
+        
+        if fallback:
+            await asyncio.gather(*(self.score_lead(lead) for lead in fallback))
+        
+        return leads
 
 
 # Singleton instance
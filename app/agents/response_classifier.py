@@ -1,6 +1,9 @@
-import json
+import re
+from typing import Optional
+from pydantic import BaseModel
 from app.models import Lead, ResponseCategory
 from app.services.llm_service import llm_service
+from app.services.token_budget import TokenBudgetExceeded
 
 
 CLASSIFIER_SYSTEM_PROMPT = """You are an email response classifier for sales teams.
@@ -20,9 +23,71 @@ Respond ONLY with valid JSON:
 }"""
 
 
+class ClassificationReply(BaseModel):
+    """Expected reply to CLASSIFIER_SYSTEM_PROMPT."""
+    category: ResponseCategory
+    confidence: Optional[float] = None
+    summary: str = ""
+
+
+# High-confidence patterns handled without the LLM. Both are anchored:
+# out-of-office only matches an auto-reply marker at the very start
+# ("Automatic reply: ...", "Out of Office: ..."), and unsubscribe only
+# matches a short message that is nothing but an opt-out. Anything else,
+# such as "I was out of the office last week" or a newsletter footer,
+# goes to the LLM.
+OUT_OF_OFFICE_PATTERN = re.compile(
+    r"^\s*(?:re:\s*)?[\[(]?(?:automatic reply|auto-?reply|autoreply|out of (?:the )?office|ooo)[\])]?\s*[:\-\]]",
+    re.IGNORECASE
+)
+UNSUBSCRIBE_PATTERN = re.compile(
+    r"^\s*(?:please\W*)?"
+    r"(?:unsubscribe(?: me)?|opt me out|remove me|take me off"
+    r"|stop (?:e-?mailing|contacting|messaging) me|(?:do not|don't|dont) (?:contact|e-?mail|message) me)"
+    r"(?: (?:from|off) (?:your|this|the) (?:e-?mail |mailing )?list)?(?: again)?"
+    r"(?:\W*(?:please|thanks|thank you))?\W*$",
+    re.IGNORECASE
+)
+UNSUBSCRIBE_MAX_CHARS = 120
+
+
 class ResponseClassifier:
+    def preclassify(self, response_text: str) -> Optional[str]:
+        """Classify obvious auto-replies and opt-outs locally.
+        
+        Returns a category, or None when the LLM should decide (including
+        when both patterns match).
+        """
+        text = response_text.strip()
+        is_ooo = OUT_OF_OFFICE_PATTERN.match(text) is not None
+        is_unsubscribe = (
+            len(text) <= UNSUBSCRIBE_MAX_CHARS and UNSUBSCRIBE_PATTERN.match(text) is not None
+        )
+        if is_ooo and not is_unsubscribe:
+            return ResponseCategory.OUT_OF_OFFICE.value
+        if is_unsubscribe and not is_ooo:
+            return ResponseCategory.UNSUBSCRIBE.value
+        return None
+    
+    def _apply_category(self, lead: Lead, category: str) -> Lead:
+        lead.response_category = category
+        
+        # Update status based on response
+        if category == "interested":
+            lead.status = "responded"
+        elif category == "not_interested":
+            lead.status = "unresponsive"
+        elif category == "unsubscribe":
+            lead.status = "unresponsive"
+        else:
+            lead.status = "responded"
+        return lead
+    
     async def classify_response(self, lead: Lead, response_text: str) -> Lead:
         """Classify an email response from a lead."""
+        category = self.preclassify(response_text)
+        if category:
+            return self._apply_category(lead, category)
         
         prompt = f"""Classify this email response:
 
@@ -35,35 +100,13 @@ Response:
 What category does this response fall into?"""
 
         try:
-            response = await llm_service.generate_json(prompt, CLASSIFIER_SYSTEM_PROMPT)
-            
-            # Clean response
-            response = response.strip()
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-            response = response.strip()
-            
-            data = json.loads(response)
-            
-            category = data.get("category", "needs_more_info")
-            lead.response_category = category
-            
-            # Update status based on response
-            if category == "interested":
-                lead.status = "responded"
-            elif category == "not_interested":
-                lead.status = "unresponsive"
-            elif category == "unsubscribe":
-                lead.status = "unresponsive"
-            else:
-                lead.status = "responded"
+            reply = await llm_service.generate_json(
+                prompt, CLASSIFIER_SYSTEM_PROMPT, schema=ClassificationReply, call_type="classify"
+            )
+            self._apply_category(lead, reply.category.value)
                 
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error for lead {lead.id}: {e}")
-            lead.response_category = ResponseCategory.NEEDS_MORE_INFO
-            lead.status = "responded"
+        except TokenBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Classification error for lead {lead.id}: {e}")
             lead.response_category = ResponseCategory.NEEDS_MORE_INFO
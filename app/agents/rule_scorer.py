@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+from app.models import Lead
+from app.config import settings
+
+
+# (regex on lowercased job title, points, label); first match wins
+SENIORITY_RULES = [
+    (r"\b(?:ceo|cto|cfo|coo|cmo|cio|ciso|cro|chief(?! of staff)|founder|co-founder|owner"
+     r"|(?<!vice )(?<!vice-)president|(?:managing|general|senior|founding) partner)\b", 45, "C-level"),
+    (r"\b(?:vp|svp|evp|vice[ -]president|head)\b", 38, "VP/Head"),
+    (r"\bdirector\b", 30, "Director"),
+    # "lead" only as a role ("team lead", "lead data engineer", "sales lead"),
+    # not as in "Lead Generation Specialist"
+    (r"\b(?:manager|principal|(?:team|tech|technical|project|program|group) lead"
+     r"|lead(?: \w+)? (?:engineer|developer|designer|architect|scientist|analyst))\b|\blead\s*$", 18, "Manager"),
+    (r"\bsenior\b|\bsr\.?\b", 12, "Senior IC"),
+]
+SENIORITY_DEFAULT = (8, "Individual contributor")
+SENIORITY_UNKNOWN = (10, "Unknown title")
+# Titles that match no rule above but may still be senior; left for the LLM
+SENIORITY_HINTS = (
+    r"\b(?:partner|executive|officer|chair\w*|board|trustee|leader|managing|general manager|gm|chief of staff)\b"
+)
+
+# Employee-count thresholds (ascending) and the points for reaching each
+SIZE_THRESHOLDS = np.array([10, 50, 200, 500, 1000, 5000])
+SIZE_POINTS = np.array([3, 7, 12, 18, 22, 26, 30])
+SIZE_UNKNOWN = 10
+
+# (regex on lowercased industry, points, label); first match wins
+# More specific sectors come first so "Biotech" or "Fintech" is not read as Technology
+INDUSTRY_RULES = [
+    (r"health|medical|pharma|biotech", 23, "Healthcare"),
+    (r"financ|bank|insurance|fintech|invest", 23, "Finance"),
+    (r"tech|software|saas|\bit\b|cloud|cyber|data|\bai\b", 25, "Technology"),
+    (r"manufactur|industrial|automotive|energy", 16, "Industrial"),
+    (r"retail|e-?commerce|consumer", 14, "Retail"),
+    (r"educat|non-?profit|government", 10, "Public/Education"),
+]
+INDUSTRY_DEFAULT = (12, "Other industry")
+INDUSTRY_UNKNOWN = 10
+
+HIGH_THRESHOLD = 70
+MEDIUM_THRESHOLD = 45
+
+
+def _match_rules(values: pd.Series, rules, default, unknown) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorised first-match lookup of points and labels."""
+    text = values.fillna("").astype(str).str.lower()
+    conditions = [text.str.contains(pattern, regex=True) for pattern, _, _ in rules]
+    missing = text.str.strip() == ""
+    points = np.select([missing] + conditions, [unknown[0]] + [p for _, p, _ in rules], default[0])
+    labels = np.select([missing] + conditions, [unknown[1]] + [l for _, _, l in rules], default[1])
+    return points, labels
+
+
+def parse_company_size(values: pd.Series) -> pd.Series:
+    """Parse sizes like '500-1000', '5000+', '10,000', '10k' to an employee count.
+
+    Ranges use their upper bound; unparseable values become NaN.
+    """
+    text = values.fillna("").astype(str).str.lower().str.replace(",", "", regex=False)
+    parts = text.str.extract(r"(\d+(?:\.\d+)?)\s*(k)?\s*(?:-|to)?\s*(\d+(?:\.\d+)?)?\s*(k)?")
+    low = pd.to_numeric(parts[0], errors="coerce") * np.where(parts[1] == "k", 1000, 1)
+    high = pd.to_numeric(parts[2], errors="coerce") * np.where(parts[3] == "k", 1000, 1)
+    return high.fillna(low)
+
+
+class RuleScorer:
+    """Deterministic lead scoring over a whole DataFrame at once.
+
+    Mirrors the rubric in SCORING_SYSTEM_PROMPT (seniority, company size,
+    industry). Leads whose score lands in the configured uncertainty band,
+    that have no job title, or whose title looks senior but matches no
+    rule, are left for the LLM.
+    """
+
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Score a DataFrame with job_title, company_size and industry columns."""
+        seniority_points, seniority_labels = _match_rules(
+            df["job_title"], SENIORITY_RULES, SENIORITY_DEFAULT, SENIORITY_UNKNOWN
+        )
+        industry_points, industry_labels = _match_rules(
+            df["industry"], INDUSTRY_RULES, INDUSTRY_DEFAULT, (INDUSTRY_UNKNOWN, "Unknown industry")
+        )
+
+        employees = parse_company_size(df["company_size"])
+        known_size = employees.notna().to_numpy()
+        size_points = np.where(
+            known_size,
+            SIZE_POINTS[np.searchsorted(SIZE_THRESHOLDS, employees.fillna(0).to_numpy(), side="right")],
+            SIZE_UNKNOWN,
+        )
+
+        score = np.clip(seniority_points + size_points + industry_points, 1, 100).astype(int)
+        priority = np.select(
+            [score >= HIGH_THRESHOLD, score >= MEDIUM_THRESHOLD], ["high", "medium"], "low"
+        )
+        size_labels = np.where(
+            known_size, df["company_size"].fillna("").astype(str) + " employees", "unknown size"
+        )
+        reason = (
+            "Rule-based: " + pd.Series(seniority_labels, index=df.index)
+            + " title, " + pd.Series(size_labels, index=df.index)
+            + ", " + pd.Series(industry_labels, index=df.index)
+        )
+
+        uncertain = (
+            ((score >= settings.rule_scoring_uncertain_min) & (score <= settings.rule_scoring_uncertain_max))
+            | (seniority_labels == SENIORITY_UNKNOWN[1])
+            | (
+                (seniority_labels == SENIORITY_DEFAULT[1])
+                & df["job_title"].fillna("").astype(str).str.lower().str.contains(SENIORITY_HINTS, regex=True).to_numpy()
+            )
+        )
+
+        return pd.DataFrame({
+            "rule_score": score,
+            "priority": priority,
+            "priority_reason": reason,
+            "escalate": uncertain,
+        }, index=df.index)
+
+    def prescore(self, leads: List[Lead]) -> Tuple[List[Lead], List[Lead]]:
+        """Score confident leads in place.
+
+        Returns (scored, escalated); escalated leads are left untouched
+        for the LLM scorer.
+        """
+        if not leads:
+            return [], []
+
+        df = pd.DataFrame({
+            "job_title": [lead.job_title for lead in leads],
+            "company_size": [lead.company_size for lead in leads],
+            "industry": [lead.industry for lead in leads],
+        })
+        result = self.score_frame(df)
+
+        scored, escalated = [], []
+        rows = zip(
+            leads,
+            result["rule_score"].tolist(),
+            result["priority"].tolist(),
+            result["priority_reason"].tolist(),
+            result["escalate"].tolist(),
+        )
+        for lead, score, priority, reason, escalate in rows:
+            if escalate:
+                escalated.append(lead)
+                continue
+            lead.priority = priority
+            lead.priority_score = score
+            lead.priority_reason = reason
+            scored.append(lead)
+
+        return scored, escalated
+
+
+# Singleton instance
+rule_scorer = RuleScorer()
@@ -5,6 +5,28 @@ from typing import Optional
 class Settings(BaseSettings):
     # Groq API
     groq_api_key: str = ""
+    # Chat-completions endpoint; point at benchmarks.llm_standin for offline runs
+    llm_base_url: str = "https://api.groq.com/openai/v1/chat/completions"
+    llm_model: str = "llama-3.1-8b-instant"
+    llm_max_concurrency: int = 4
+    llm_requests_per_minute: float = 30
+    llm_timeout: float = 30.0
+    llm_http2: bool = True
+    llm_max_connections: int = 10
+    llm_max_keepalive_connections: int = 5
+    # Ask the provider for JSON object replies on structured calls
+    llm_json_mode: bool = True
+    # Token budget (unset = unlimited): a rolling per-minute cap on all calls,
+    # and a total per campaign run that stops the pipeline when used up
+    llm_tokens_per_minute: Optional[int] = None
+    llm_campaign_token_budget: Optional[int] = None
+    
+    # LLM response cache (set LLM_CACHE_PATH empty for memory-only)
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "data/llm_cache.sqlite3"
+    llm_cache_ttl_seconds: float = 7 * 24 * 3600
+    llm_cache_memory_entries: int = 1024
+    llm_cache_disk_entries: int = 100_000
     
     # SMTP / MailHog
     smtp_host: str = "mailhog"
@@ -12,9 +34,39 @@ class Settings(BaseSettings):
     smtp_username: Optional[str] = ""
     smtp_password: Optional[str] = ""
     sender_email: str = "sales@yourcompany.com"
+    smtp_max_concurrency: int = 2  # pooled connections
+    smtp_max_messages_per_connection: int = 100
+    smtp_timeout: float = 30.0
+    
+    # Pipeline
+    pipeline_concurrency: int = 5
+    pipeline_chunk_size: int = 500
+    scoring_batch_size: int = 10  # leads per scoring call; 1 disables batching
+    # Workers per pipeline stage; unset LLM stages use pipeline_concurrency,
+    # sending uses smtp_max_concurrency
+    pipeline_score_workers: Optional[int] = None
+    pipeline_enrich_workers: Optional[int] = None
+    pipeline_draft_workers: Optional[int] = None
+    pipeline_send_workers: Optional[int] = None
+    
+    # Rule-based pre-scoring: scores inside the band are escalated to the LLM
+    rule_scoring_enabled: bool = True
+    rule_scoring_uncertain_min: int = 45
+    rule_scoring_uncertain_max: int = 65
+    
+    # Personas/company facts kept in memory for enrichment reuse
+    enrichment_cache_size: int = 10_000
+    checkpoint_db_path: str = "data/checkpoints.sqlite3"
+    fingerprint_db_path: str = "data/fingerprints.sqlite3"
+    
+    # Reports wait this long for AI insights, then ship without them
+    report_insights_deadline: float = 5.0
     
     # Paths
     leads_csv_path: str = "data/leads.csv"
+    csv_snapshot_max_bytes: int = 32 * 1024 * 1024  # larger CSVs are not cached in memory
+    lead_store_backend: str = "csv"  # "csv" or "sqlite"
+    lead_store_db_path: str = "data/leads.sqlite3"
     reports_path: str = "reports/"
     
     class Config:
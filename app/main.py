@@ -1,14 +1,28 @@
 import asyncio
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from typing import List, Optional
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, List, Optional, Set, Tuple
 
-from app.models import Lead
-from app.services.csv_handler import csv_handler
+from app.config import settings
+from app.models import Lead, LeadStatus, LeadPriority, CampaignStats
+from app.services.csv_handler import LEAD_COLUMNS
+from app.services.lead_store import lead_store
+from app.services.campaign_stats import campaign_stats
+from app.services.checkpoint_store import checkpoint_store
 from app.services.email_service import email_service
+from app.services.event_bus import event_bus, format_sse
+from app.services.fingerprint_store import fingerprint_store, is_current
+from app.services.llm_service import llm_service
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics
 from app.services.report_generator import report_generator
+from app.services.stage_graph import Stage, StageGraph
+from app.services.token_budget import TokenBudgetExceeded
 from app.agents.lead_scorer import lead_scorer
-from app.agents.lead_enricher import lead_enricher
+from app.agents.rule_scorer import rule_scorer
+from app.agents.lead_enricher import FILLED_FIELDS as ENRICH_FILLED_FIELDS, lead_enricher
 from app.agents.email_drafter import email_drafter
 from app.agents.response_classifier import response_classifier
 
@@ -23,6 +37,10 @@ app = FastAPI(
 # Request/Response models
 class CampaignRequest(BaseModel):
     product_description: Optional[str] = None
+    resume: bool = False  # skip stages completed by an interrupted run
+    incremental: bool = False  # only process new or changed leads
+    max_sends: Optional[int] = Field(None, ge=1)  # stop after this many emails
+    deadline_seconds: Optional[float] = Field(None, gt=0)  # stop this long after starting
 
 
 class ResponseClassifyRequest(BaseModel):
@@ -30,12 +48,48 @@ class ResponseClassifyRequest(BaseModel):
     response_text: str
 
 
+class BulkClassifyRequest(BaseModel):
+    responses: List[ResponseClassifyRequest]
+
+
+class LeadPage(BaseModel):
+    leads: List[Dict]
+    next_cursor: Optional[int] = None  # pass as ?cursor= for the next page
+
+
 class PipelineStatus(BaseModel):
     status: str
     total_leads: int
     processed: int
     contacted: int
     message: str
+    rule_scored: int = 0
+    llm_scored: int = 0
+    throughput: float = 0.0  # leads per second
+    eta_seconds: Optional[float] = None
+    stop_reason: Optional[str] = None  # set when a send limit, deadline or token budget ended the run early
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    token_budget: Optional[int] = None  # LLM tokens allowed for the current run
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release pooled connections."""
+    await llm_service.aclose()
+    await email_service.aclose()
+
+
+PIPELINE_STAGE_SECONDS = metrics.histogram(
+    "pipeline_stage_seconds", "Time spent in each pipeline stage (per lead, or per batch/chunk)", ["stage"]
+)
+PIPELINE_STAGES_COMPLETED = metrics.counter(
+    "pipeline_stages_completed_total", "Lead stages completed by the pipeline", ["stage"]
+)
+PIPELINE_LEADS_PROCESSED = metrics.counter(
+    "pipeline_leads_processed_total", "Leads that went through the pipeline"
+)
 
 
 # Store pipeline status
@@ -44,9 +98,39 @@ pipeline_status = {
     "total_leads": 0,
     "processed": 0,
     "contacted": 0,
-    "message": "Ready to start"
+    "message": "Ready to start",
+    "rule_scored": 0,
+    "llm_scored": 0,
+    "stop_reason": None,
+    "started_at": None,
+    "finished_at": None
 }
 
+# Seconds between keep-alive comments on idle event streams
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def current_status() -> Dict:
+    """pipeline_status plus throughput, ETA and LLM token usage for the current run."""
+    status = {
+        key: value for key, value in pipeline_status.items()
+        if key not in ("started_at", "finished_at")
+    }
+    status["throughput"] = 0.0
+    status["eta_seconds"] = None
+    
+    started_at = pipeline_status.get("started_at")
+    if started_at is not None and pipeline_status["processed"]:
+        finished_at = pipeline_status.get("finished_at") or time.monotonic()
+        elapsed = max(finished_at - started_at, 1e-6)
+        throughput = pipeline_status["processed"] / elapsed
+        remaining = max(pipeline_status["total_leads"] - pipeline_status["processed"], 0)
+        status["throughput"] = round(throughput, 3)
+        if pipeline_status["status"] == "running":
+            status["eta_seconds"] = round(remaining / throughput, 1)
+    status.update(llm_service.budget.snapshot())
+    return status
+
 
 @app.get("/")
 async def root():
@@ -54,79 +138,466 @@ async def root():
         "message": "AI Sales Campaign CRM",
         "status": "running",
         "endpoints": {
-            "GET /leads": "List all leads",
+            "GET /leads": "List leads (paginated, filterable)",
             "POST /campaign/run": "Run full campaign pipeline",
             "GET /campaign/status": "Check pipeline status",
+            "GET /campaign/events": "Stream pipeline progress (SSE)",
+            "GET /metrics": "Prometheus metrics",
+            "GET /campaign/stats": "Current campaign statistics",
             "POST /campaign/report": "Generate campaign report",
-            "POST /response/classify": "Classify a lead response"
+            "GET /campaign/report/stream": "Stream campaign report",
+            "POST /response/classify": "Classify a lead response",
+            "POST /response/classify/bulk": "Classify many lead responses"
         }
     }
 
 
-@app.get("/leads", response_model=List[Lead])
-async def get_leads():
-    """Get all leads from CSV."""
-    return csv_handler.read_leads()
+def lead_cache_headers() -> Dict[str, str]:
+    """Validators for responses built from the lead store's current contents."""
+    tag, modified = lead_store.version()
+    return {
+        "ETag": f'W/"{tag}"',
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "no-cache"
+    }
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Whether the client's cached copy (If-None-Match / If-Modified-Since) is current."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: W/"x" matches "x"
+        etag = headers["ETag"].removeprefix("W/")
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            modified = parsedate_to_datetime(headers["Last-Modified"])
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+    return False
+
+
+@app.get("/leads", response_model=LeadPage)
+async def get_leads(
+    request: Request,
+    response: Response,
+    status: Optional[LeadStatus] = None,
+    priority: Optional[LeadPriority] = None,
+    min_score: Optional[int] = Query(None, ge=1, le=100),
+    industry: Optional[str] = None,
+    cursor: Optional[int] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = None
+):
+    """Get a page of leads in id order.
+    
+    Page with ``cursor`` (the previous page's ``next_cursor``) or with
+    ``offset``. ``fields`` is a comma-separated list of lead fields to
+    return, e.g. ``fields=id,name,priority``. Rows that fail validation
+    are left out, as GET /leads/{id} answers 404 for them, so a page can
+    hold fewer than ``limit`` leads.
+    """
+    include = None
+    if fields:
+        include = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = include - set(LEAD_COLUMNS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    headers = lead_cache_headers()
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    # One extra row tells us whether there is a next page
+    leads = lead_store.query_leads(
+        status=status.value if status else None,
+        priority=priority.value if priority else None,
+        min_score=min_score,
+        industry=industry,
+        after_id=cursor,
+        offset=offset,
+        limit=limit + 1,
+        validate=False
+    )
+    next_cursor = leads[limit - 1].id if len(leads) > limit else None
+    
+    # Rows are built unvalidated; only the page itself is validated
+    page = []
+    for lead in leads[:limit]:
+        try:
+            page.append(Lead.model_validate(dict(lead)).model_dump(include=include))
+        except ValidationError as e:
+            print(f"Skipping invalid lead {lead.id}: {e.error_count()} validation error(s)")
+    
+    return LeadPage(leads=page, next_cursor=next_cursor)
 
 
 @app.get("/leads/{lead_id}", response_model=Lead)
-async def get_lead(lead_id: int):
+async def get_lead(lead_id: int, request: Request, response: Response):
     """Get a specific lead by ID."""
-    lead = csv_handler.get_lead_by_id(lead_id)
+    headers = lead_cache_headers()
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    
+    lead = lead_store.get_lead_by_id(lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
+    response.headers.update(headers)
     return lead
 
 
-async def run_pipeline(product_description: Optional[str] = None):
-    """Run the full campaign pipeline."""
-    global pipeline_status
+def needs_stage(
+    lead: Lead,
+    stage: str,
+    completed: Set[str],
+    fingerprints: Optional[Dict[str, str]],
+    product_description: Optional[str] = None
+) -> bool:
+    """Whether ``stage`` still has to run for ``lead``.
     
-    pipeline_status["status"] = "running"
-    pipeline_status["message"] = "Loading leads..."
+    ``fingerprints`` is None outside incremental mode.
+    """
+    if stage in completed:
+        return False
+    if fingerprints is not None and is_current(lead, stage, fingerprints, product_description):
+        return False
+    return True
+
+
+class LeadJob:
+    """A lead moving through the pipeline, with its checkpoint state.
     
-    leads = csv_handler.read_leads()
-    pipeline_status["total_leads"] = len(leads)
+    ``fingerprints`` is None outside incremental mode. ``score_fields``
+    keeps the fields enrich may fill in as they were when the job was
+    created, so scoring reads the same inputs whichever stage runs first.
+    """
     
-    processed_leads = []
+    def __init__(
+        self,
+        lead: Lead,
+        completed: Optional[Set[str]] = None,
+        fingerprints: Optional[Dict[str, str]] = None
+    ):
+        self.lead = lead
+        self.completed = set(completed or ())
+        self.fingerprints = fingerprints
+        self.score_fields = {field: getattr(lead, field) for field in ENRICH_FILLED_FIELDS}
+
+
+def checkpoint(job: LeadJob, stage: str):
+    """Record that ``stage`` finished for ``job`` so a resumed run skips it."""
+    job.completed.add(stage)
+    checkpoint_store.mark(job.lead, stage, job.completed)
+    campaign_stats.record(job.lead)
+    PIPELINE_STAGES_COMPLETED.inc(stage=stage)
+    event_bus.publish("stage", {"lead_id": job.lead.id, "stage": stage})
+
+
+def rule_prescore(jobs: List[LeadJob], product_description: Optional[str] = None):
+    """Score confident leads with the rule engine before the LLM stages.
     
-    for i, lead in enumerate(leads):
-        pipeline_status["processed"] = i + 1
-        pipeline_status["message"] = f"Processing {lead.name}..."
-        
+    Rule-scored leads are checkpointed, so the score stage skips them.
+    """
+    if not settings.rule_scoring_enabled:
+        return
+    
+    pending = {
+        id(job.lead): job for job in jobs
+        if needs_stage(job.lead, "score", job.completed, job.fingerprints, product_description)
+    }
+    with PIPELINE_STAGE_SECONDS.time(stage="rule_score"):
+        rule_scored, _ = rule_scorer.prescore([job.lead for job in pending.values()])
+    pipeline_status["rule_scored"] += len(rule_scored)
+    
+    for lead in rule_scored:
+        checkpoint(pending[id(lead)], "score")
+
+
+def build_pipeline(
+    product_description: Optional[str] = None,
+    max_sends: Optional[int] = None,
+    deadline: Optional[float] = None
+) -> StageGraph[LeadJob]:
+    """The campaign pipeline as a stage graph.
+    
+        score  --+
+                 +--> draft --> send
+        enrich --+
+    
+    Scoring and enrichment read only raw lead fields, so they run side by
+    side. Each stage has its own worker pool; LLM scoring takes leads in
+    batches of SCORING_BATCH_SIZE. Within one run of the graph, drafting
+    and sending take the highest priority_score first (enrichment too, for
+    leads already scored); run_pipeline feeds limited runs to it best
+    leads first across the whole store. The graph stops
+    starting new work after ``max_sends`` emails, once ``deadline`` (a
+    time.monotonic() value) has passed, or when the campaign's LLM token
+    budget is used up.
+    """
+    sends = {"started": 0, "succeeded": 0}
+    send_settled = asyncio.Condition()  # notified whenever a send finishes
+    
+    def should_stop() -> bool:
+        if pipeline_status["stop_reason"] is None:
+            if max_sends is not None and sends["succeeded"] >= max_sends:
+                pipeline_status["stop_reason"] = f"reached {max_sends} sends"
+            elif deadline is not None and time.monotonic() >= deadline:
+                pipeline_status["stop_reason"] = "deadline reached"
+            elif llm_service.budget.exhausted:
+                pipeline_status["stop_reason"] = "token budget exhausted"
+        return pipeline_status["stop_reason"] is not None
+    
+    def by_score(job: LeadJob) -> float:
+        return job.lead.priority_score or 0
+
+    def needs(stage: str):
+        return lambda job: needs_stage(job.lead, stage, job.completed, job.fingerprints, product_description)
+    
+    def per_lead(stage: str, action):
+        async def run(jobs: List[LeadJob]):
+            for job in jobs:
+                pipeline_status["message"] = f"Processing {job.lead.name}..."
+                with PIPELINE_STAGE_SECONDS.time(stage=stage):
+                    job.lead = await action(job.lead)
+                checkpoint(job, stage)
+        return run
+    
+    batch_scoring = settings.scoring_batch_size > 1
+    
+    async def score(jobs: List[LeadJob]):
+        pipeline_status["llm_scored"] += len(jobs)
+        # Enrich runs alongside and may fill in fields the prompt reads, so
+        # score copies with those fields as they were before enrichment
+        leads = [job.lead.model_copy(update=job.score_fields) for job in jobs]
+        if batch_scoring:
+            with PIPELINE_STAGE_SECONDS.time(stage="score_batch"):
+                await lead_scorer.score_leads(leads)
+        for job, lead in zip(jobs, leads):
+            if not batch_scoring:
+                pipeline_status["message"] = f"Processing {lead.name}..."
+                with PIPELINE_STAGE_SECONDS.time(stage="score"):
+                    await lead_scorer.score_lead(lead)
+            job.lead.priority = lead.priority
+            job.lead.priority_score = lead.priority_score
+            job.lead.priority_reason = lead.priority_reason
+            checkpoint(job, "score")
+    
+    async def draft(lead: Lead) -> Lead:
+        return await email_drafter.draft_email(lead, product_description)
+    
+    async def send(jobs: List[LeadJob]):
+        for job in jobs:
+            if max_sends is not None:
+                # Sends are reserved so concurrent workers cannot overshoot
+                # max_sends. While the in-flight ones could still reach it,
+                # wait for them: a failed one frees its slot for this lead.
+                async with send_settled:
+                    await send_settled.wait_for(
+                        lambda: sends["started"] < max_sends or sends["succeeded"] >= max_sends
+                    )
+                if should_stop():
+                    continue
+            sends["started"] += 1
+            success = False
+            try:
+                with PIPELINE_STAGE_SECONDS.time(stage="send"):
+                    success = await email_service.send_outreach_email(job.lead)
+            finally:
+                if success:
+                    sends["succeeded"] += 1
+                    checkpoint(job, "send")
+                else:
+                    sends["started"] -= 1
+                async with send_settled:
+                    send_settled.notify_all()
+    
+    def needs_send(job: LeadJob) -> bool:
+        # Never repeated for a lead already sent to
+        if "send" in job.completed:
+            return False
+        incremental = job.fingerprints is not None
+        return not (incremental and job.lead.status != LeadStatus.NEW.value)
+    
+    def lead_done(job: LeadJob):
+        pipeline_status["processed"] += 1
+        if "send" in job.completed:
+            pipeline_status["contacted"] += 1
+        PIPELINE_LEADS_PROCESSED.inc()
+        event_bus.publish("progress", current_status())
+    
+    llm_workers = settings.pipeline_concurrency
+    return StageGraph([
+        Stage("score", score, workers=settings.pipeline_score_workers or llm_workers,
+              batch_size=max(1, settings.scoring_batch_size), needed=needs("score")),
+        Stage("enrich", per_lead("enrich", lead_enricher.enrich_lead),
+              workers=settings.pipeline_enrich_workers or llm_workers, needed=needs("enrich"),
+              priority=by_score),
+        Stage("draft", per_lead("draft", draft), depends_on=("score", "enrich"),
+              workers=settings.pipeline_draft_workers or llm_workers, needed=needs("draft"),
+              priority=by_score),
+        Stage("send", send, depends_on=("draft",),
+              workers=settings.pipeline_send_workers or settings.smtp_max_concurrency, needed=needs_send,
+              priority=by_score),
+    ], on_item_done=lead_done, should_stop=should_stop)
+
+
+def load_jobs(
+    chunk: List[Lead],
+    resume: bool,
+    incremental: bool
+) -> Tuple[List[LeadJob], List[int]]:
+    """Validate ``chunk`` and wrap each lead in a LeadJob.
+    
+    Returns the jobs and their positions in ``chunk``. Invalid leads get no
+    job, so they are written back unchanged rather than failing the run.
+    """
+    lead_ids = [lead.id for lead in chunk]
+    checkpoints = checkpoint_store.load_many(lead_ids) if resume else {}
+    stored = fingerprint_store.load_many(lead_ids) if incremental else {}
+    jobs, positions = [], []
+    for position, lead in enumerate(chunk):
         try:
-            # Step 1: Score the lead
-            lead = await lead_scorer.score_lead(lead)
-            
-            # Step 2: Enrich with persona
-            lead = await lead_enricher.enrich_lead(lead)
-            
-            # Step 3: Draft personalized email
-            lead = await email_drafter.draft_email(lead, product_description)
-            
-            # Step 4: Send email
-            success = await email_service.send_outreach_email(lead)
-            if success:
-                pipeline_status["contacted"] += 1
-            
-            processed_leads.append(lead)
-            
-            # Small delay to avoid rate limiting
-            await asyncio.sleep(3)
-            
-        except Exception as e:
-            print(f"Error processing lead {lead.id}: {e}")
-            processed_leads.append(lead)
+            lead = Lead.model_validate(dict(lead))
+        except ValidationError as e:
+            print(f"Skipping invalid lead {lead.id}: {e.error_count()} validation error(s)")
+            continue
+        # Resume from the lead as it was after its last finished stage
+        lead, completed = checkpoints.get(lead.id, (lead, set()))
+        fingerprints = stored.get(lead.id, {}) if incremental else None
+        jobs.append(LeadJob(lead, completed, fingerprints))
+        positions.append(position)
+    return jobs, positions
+
+
+def load_checkpointed_jobs(lead_ids: List[int], incremental: bool) -> List[LeadJob]:
+    """Rebuild the jobs for ``lead_ids``, in that order, from their checkpoints.
     
-    # Save updated leads back to CSV
-    csv_handler.write_leads(processed_leads)
+    Leads without a checkpoint get no job.
+    """
+    checkpoints = checkpoint_store.load_many(lead_ids)
+    stored = fingerprint_store.load_many(lead_ids) if incremental else {}
+    return [
+        LeadJob(*checkpoints[lead_id], stored.get(lead_id, {}) if incremental else None)
+        for lead_id in lead_ids if lead_id in checkpoints
+    ]
+
+
+async def run_pipeline(
+    product_description: Optional[str] = None,
+    resume: bool = False,
+    incremental: bool = False,
+    max_sends: Optional[int] = None,
+    deadline_seconds: Optional[float] = None
+):
+    """Run the full campaign pipeline through per-stage worker pools.
     
-    # Generate report
-    pipeline_status["message"] = "Generating report..."
-    await report_generator.save_report(processed_leads)
+    Leads are streamed from the store in chunks and written back chunk by
+    chunk, so memory use does not grow with the size of the lead list.
+    With ``resume``, stages checkpointed by an interrupted run are skipped;
+    with ``incremental``, stages whose inputs have not changed are skipped.
     
-    pipeline_status["status"] = "completed"
-    pipeline_status["message"] = f"Pipeline complete! {pipeline_status['contacted']}/{len(leads)} emails sent."
+    ``max_sends``, ``deadline_seconds`` and the LLM token budget
+    (``llm_campaign_token_budget``) end the run early. Runs limited by
+    ``max_sends`` or ``deadline_seconds`` first score every chunk, then run
+    the remaining stages over the whole lead list in priority_score order,
+    a chunk of the best leads at a time, so the limits are spent on the
+    best leads in the store rather than the first ones in it. Leads not
+    reached are still written back, scored. A token budget alone does not
+    do this, since scoring every lead could use up the whole budget before
+    anything is drafted or sent.
+    """
+    global pipeline_status
+    
+    pipeline_status["status"] = "running"
+    pipeline_status["message"] = "Loading leads..."
+    pipeline_status["started_at"] = time.monotonic()
+    pipeline_status["stop_reason"] = None
+    llm_service.budget.start_campaign(settings.llm_campaign_token_budget)
+    event_bus.publish("status", current_status())
+    
+    try:
+        if not resume:
+            checkpoint_store.clear()
+        
+        total_leads = lead_store.count()
+        pipeline_status["total_leads"] = total_leads
+        chunk_size = settings.pipeline_chunk_size
+        
+        # Rate limiting is handled by the LLM and SMTP services, which block
+        # stage workers once their own concurrency limits are reached.
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        pipeline = build_pipeline(product_description, max_sends, deadline)
+        limited = max_sends is not None or deadline is not None
+        scoring = StageGraph([pipeline.stages["score"]], should_stop=pipeline.should_stop)
+        ranking: List[Tuple[int, int]] = []  # (-priority_score, id) of every valid lead
+        
+        # Save updated leads as each chunk completes, in their original order
+        with lead_store.open_writer() as writer:
+            for chunk in lead_store.iter_leads(chunk_size, validate=False):
+                jobs, positions = load_jobs(chunk, resume, incremental)
+                if not pipeline.should_stop():
+                    rule_prescore(jobs, product_description)
+                if limited:
+                    # Only score here; the other stages run below, best leads
+                    # first, from the checkpoint taken of every valid lead
+                    await scoring.run(jobs)
+                    checkpoint_store.save_many((job.lead, job.completed) for job in jobs)
+                    ranking.extend((-(job.lead.priority_score or 0), job.lead.id) for job in jobs)
+                else:
+                    await pipeline.run(jobs)
+                processed_chunk = [job.lead for job in jobs]
+                for position, lead in zip(positions, processed_chunk):
+                    chunk[position] = lead
+                writer.write(chunk)
+                campaign_stats.record_many(processed_chunk)
+                fingerprint_store.save_many(((job.lead, job.completed) for job in jobs), product_description)
+        
+        if limited:
+            ranking.sort()
+            for start in range(0, len(ranking), chunk_size):
+                if pipeline.should_stop():
+                    break
+                lead_ids = [lead_id for _, lead_id in ranking[start:start + chunk_size]]
+                # Indexed lookups; re-reading the lead store per window would
+                # parse the whole file each time
+                jobs = load_checkpointed_jobs(lead_ids, incremental)
+                await pipeline.run(jobs)
+                campaign_stats.record_many([job.lead for job in jobs])
+                fingerprint_store.save_many(((job.lead, job.completed) for job in jobs), product_description)
+            
+            # Write the prioritised leads back from their checkpoints, in file order
+            with lead_store.open_writer() as writer:
+                for chunk in lead_store.iter_leads(chunk_size, validate=False):
+                    checkpoints = checkpoint_store.load_many([lead.id for lead in chunk])
+                    writer.write([checkpoints[lead.id][0] if lead.id in checkpoints else lead for lead in chunk])
+        
+        # Every lead is persisted, so the next run starts clean
+        checkpoint_store.clear()
+        
+        # Generate report
+        pipeline_status["message"] = "Generating report..."
+        await report_generator.save_report_chunks(lead_store.iter_leads(chunk_size))
+        
+        pipeline_status["status"] = "completed"
+        pipeline_status["message"] = f"Pipeline complete! {pipeline_status['contacted']}/{total_leads} emails sent."
+        if pipeline_status["stop_reason"]:
+            pipeline_status["message"] += f" Stopped early: {pipeline_status['stop_reason']}."
+    except Exception as e:
+        # Checkpoints are kept, so the run can be resumed
+        print(f"Pipeline failed: {e}")
+        pipeline_status["status"] = "failed"
+        pipeline_status["message"] = f"Pipeline failed: {e}"
+    finally:
+        llm_service.budget.end_campaign()
+        pipeline_status["finished_at"] = time.monotonic()
+        event_bus.publish("status", current_status())
 
 
 @app.post("/campaign/run")
@@ -134,7 +605,12 @@ async def start_campaign(
     background_tasks: BackgroundTasks,
     request: CampaignRequest = CampaignRequest()
 ):
-    """Start the full campaign pipeline in the background."""
+    """Start the full campaign pipeline in the background.
+    
+    With ``max_sends`` or ``deadline_seconds``, every lead is scored first
+    and drafting and sending then go through the whole lead list in
+    priority_score order.
+    """
     global pipeline_status
     
     if pipeline_status["status"] == "running":
@@ -146,10 +622,19 @@ async def start_campaign(
         "total_leads": 0,
         "processed": 0,
         "contacted": 0,
-        "message": "Starting pipeline..."
+        "message": "Starting pipeline...",
+        "rule_scored": 0,
+        "llm_scored": 0,
+        "stop_reason": None,
+        "started_at": None,
+        "finished_at": None
     }
+    event_bus.publish("status", current_status())
     
-    background_tasks.add_task(run_pipeline, request.product_description)
+    background_tasks.add_task(
+        run_pipeline, request.product_description, request.resume, request.incremental,
+        request.max_sends, request.deadline_seconds
+    )
     
     return {"message": "Campaign pipeline started", "status_endpoint": "/campaign/status"}
 
@@ -157,26 +642,82 @@ async def start_campaign(
 @app.get("/campaign/status", response_model=PipelineStatus)
 async def get_campaign_status():
     """Get current pipeline status."""
-    return PipelineStatus(**pipeline_status)
+    return PipelineStatus(**current_status())
+
+
+@app.get("/campaign/events")
+async def campaign_events():
+    """Stream pipeline progress as Server-Sent Events.
+    
+    Sends the current status first, then ``stage`` events as each lead
+    finishes a stage, ``progress`` events with counters, throughput and
+    ETA as each lead completes, and ``status`` events when a run starts
+    or finishes.
+    """
+    async def stream():
+        queue = event_bus.subscribe()
+        try:
+            yield format_sse("status", current_status())
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            event_bus.unsubscribe(queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/campaign/stats", response_model=CampaignStats)
+async def get_campaign_stats(verify: bool = False):
+    """Get campaign statistics.
+    
+    Served from a running aggregate; ``verify`` recomputes them from every
+    lead instead and repairs the aggregate if the two disagree.
+    """
+    if verify:
+        stats, _ = campaign_stats.verify()
+        return stats
+    return campaign_stats.get()
 
 
 @app.post("/campaign/report")
 async def generate_report():
     """Generate a campaign report from current leads."""
-    leads = csv_handler.read_leads()
-    filepath = await report_generator.save_report(leads)
+    filepath = await report_generator.save_report_chunks(
+        lead_store.iter_leads(settings.pipeline_chunk_size)
+    )
     return {"message": "Report generated", "filepath": filepath}
 
 
+@app.get("/campaign/report/stream")
+async def stream_report():
+    """Stream a campaign report as markdown without saving it."""
+    pieces = report_generator.render_report(lead_store.iter_leads(settings.pipeline_chunk_size))
+    return StreamingResponse(pieces, media_type="text/markdown")
+
+
 @app.post("/response/classify")
 async def classify_response(request: ResponseClassifyRequest):
     """Classify an email response from a lead."""
-    lead = csv_handler.get_lead_by_id(request.lead_id)
+    lead = lead_store.get_lead_by_id(request.lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
-    lead = await response_classifier.classify_response(lead, request.response_text)
-    csv_handler.update_lead(lead)
+    try:
+        lead = await response_classifier.classify_response(lead, request.response_text)
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not lead_store.update_lead(lead):
+        raise HTTPException(status_code=500, detail="Failed to save classified lead")
+    campaign_stats.record(lead)
     
     return {
         "lead_id": lead.id,
@@ -185,6 +726,42 @@ async def classify_response(request: ResponseClassifyRequest):
     }
 
 
+@app.post("/response/classify/bulk")
+async def classify_responses_bulk(request: BulkClassifyRequest):
+    """Classify many email responses concurrently and save them in one write."""
+    leads = lead_store.get_leads_by_ids([item.lead_id for item in request.responses])
+    
+    async def classify(item: ResponseClassifyRequest):
+        lead = leads.get(item.lead_id)
+        if not lead:
+            return {"lead_id": item.lead_id, "error": "Lead not found"}
+        await response_classifier.classify_response(lead, item.response_text)
+        return {
+            "lead_id": lead.id,
+            "response_category": lead.response_category,
+            "status": lead.status
+        }
+    
+    try:
+        results = await asyncio.gather(*(classify(item) for item in request.responses))
+    except TokenBudgetExceeded as e:
+        # Nothing is saved, so no lead keeps a fallback category
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if leads:
+        if not lead_store.update_leads(list(leads.values())):
+            raise HTTPException(status_code=500, detail="Failed to save classified leads")
+        campaign_stats.record_many(leads.values())
+    
+    return {"results": results, "updated": len(leads)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency and throughput metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
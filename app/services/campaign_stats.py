@@ -0,0 +1,95 @@
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.models import Lead, CampaignStats
+from app.config import settings
+from app.services.lead_store import lead_store
+from app.services.report_generator import tally_lead, update_response_rate
+
+
+class LeadState(NamedTuple):
+    """The fields of a lead that CampaignStats depends on."""
+    status: Optional[str]
+    priority: Optional[str]
+
+
+def _state(lead: Lead) -> LeadState:
+    return LeadState(lead.status, lead.priority)
+
+
+class CampaignStatsTracker:
+    """CampaignStats kept as a running aggregate instead of a full rescan.
+
+    The tracker remembers the state it last counted for each lead, so
+    ``record`` moves a lead between buckets in O(1) and is safe to call
+    more than once for the same change. The aggregate is built from the
+    lead store on first use, whether that is a read or a ``record``.
+    """
+
+    def __init__(self, lead_chunks_source: Optional[Callable[[], Iterable[List[Lead]]]] = None):
+        # Where full recomputes read leads from; defaults to the lead store
+        self._lead_chunks_source = lead_chunks_source or (
+            lambda: lead_store.iter_leads(settings.pipeline_chunk_size, validate=False)
+        )
+        self._stats: Optional[CampaignStats] = None
+        self._states: Dict[int, LeadState] = {}
+
+    def _build(self) -> Tuple[CampaignStats, Dict[int, LeadState]]:
+        stats = CampaignStats()
+        states: Dict[int, LeadState] = {}
+        for chunk in self._lead_chunks_source():
+            for lead in chunk:
+                state = _state(lead)
+                states[lead.id] = state
+                tally_lead(stats, state)
+        return update_response_rate(stats), states
+
+    def _materialize(self) -> CampaignStats:
+        if self._stats is None:
+            self._stats, self._states = self._build()
+        return self._stats
+
+    def record(self, lead: Lead) -> None:
+        """Apply a lead's current status and priority to the aggregate."""
+        # Built now rather than on the first read: during a run the store
+        # still holds the leads as they were before this change
+        stats = self._materialize()
+
+        state = _state(lead)
+        previous = self._states.get(lead.id)
+        if previous == state:
+            return
+        if previous is not None:
+            tally_lead(stats, previous, -1)
+        tally_lead(stats, state)
+        self._states[lead.id] = state
+        update_response_rate(stats)
+
+    def record_many(self, leads: Iterable[Lead]) -> None:
+        for lead in leads:
+            self.record(lead)
+
+    def get(self) -> CampaignStats:
+        """Current stats; O(1) once the aggregate has been built."""
+        return self._materialize().model_copy()
+
+    def verify(self) -> Tuple[CampaignStats, bool]:
+        """Recompute from the store and cross-check the running aggregate.
+
+        The recomputed figures replace the aggregate when they differ.
+        Returns (stats, consistent).
+        """
+        recomputed, states = self._build()
+        consistent = self._stats == recomputed
+        if not consistent:
+            if self._stats is not None:
+                print(f"Campaign stats drifted: {self._stats} != {recomputed}")
+            self._stats, self._states = recomputed, states
+        return recomputed.model_copy(), consistent
+
+    def reset(self) -> None:
+        """Drop the aggregate; it is rebuilt on next access."""
+        self._stats = None
+        self._states = {}
+
+
+# Singleton instance
+campaign_stats = CampaignStatsTracker()
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+from app.models import Lead
+from app.config import settings
+from app.services.sqlite_batches import in_batches
+
+
+# Pipeline stages in execution order
+STAGES = ("score", "enrich", "draft", "send")
+
+
+class CheckpointStore:
+    """Records which pipeline stages each lead has completed.
+
+    Every completed stage stores a snapshot of the lead, so a resumed run
+    can pick up from the last finished stage without repeating LLM calls
+    or re-sending email.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or settings.checkpoint_db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lead_checkpoints ("
+            "lead_id INTEGER PRIMARY KEY, stages TEXT NOT NULL, "
+            "lead_json TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def mark(self, lead: Lead, stage: str, stages: Iterable[str]) -> None:
+        """Record that ``stage`` finished for ``lead``.
+
+        ``stages`` is the full set of stages completed so far, including
+        ``stage`` itself.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO lead_checkpoints (lead_id, stages, lead_json, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (lead.id, ",".join(s for s in STAGES if s in stages), lead.model_dump_json(), time.time())
+            )
+            self._db.commit()
+
+    def save_many(self, leads: Iterable[Tuple[Lead, Iterable[str]]]) -> None:
+        """Store a snapshot of each lead with the stages it has completed.
+
+        Like ``mark`` for a whole batch, in one transaction; a lead may
+        have completed no stages yet.
+        """
+        now = time.time()
+        rows = [
+            (lead.id, ",".join(s for s in STAGES if s in stages), lead.model_dump_json(), now)
+            for lead, stages in leads
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO lead_checkpoints (lead_id, stages, lead_json, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+
+    def load_many(self, lead_ids: Iterable[int]) -> Dict[int, Tuple[Lead, Set[str]]]:
+        """Fetch checkpoints for a batch of leads."""
+        rows = []
+        for batch, placeholders in in_batches(lead_ids):
+            with self._lock:
+                rows += self._db.execute(
+                    f"SELECT lead_id, stages, lead_json FROM lead_checkpoints "
+                    f"WHERE lead_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+        return {
+            lead_id: (Lead.model_validate_json(lead_json), set(filter(None, stages.split(","))))
+            for lead_id, stages, lead_json in rows
+        }
+
+    def count(self) -> int:
+        """Number of leads with at least one completed stage."""
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM lead_checkpoints").fetchone()
+        return count
+
+    def clear(self) -> None:
+        """Forget all checkpoints (start of a fresh run, or a finished run)."""
+        with self._lock:
+            self._db.execute("DELETE FROM lead_checkpoints")
+            self._db.commit()
+
+
+# Singleton instance
+checkpoint_store = CheckpointStore()
@@ -1,33 +1,202 @@
+import os
 import pandas as pd
 import numpy as np
-from typing import List, Optional
-from app.models import Lead
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from pydantic import ValidationError
+from app.models import Lead, LeadStatus
 from app.config import settings
+from app.services.metrics import metrics
+
+
+# Column order of the leads CSV
+LEAD_COLUMNS = [
+    "id", "name", "email", "company", "job_title", 
+    "industry", "company_size", "location", "persona",
+    "priority", "priority_score", "priority_reason",
+    "status", "email_draft", "response_category"
+]
+
+# Columns parsed as (nullable) integers
+INT_COLUMNS = ["id", "priority_score"]
+
+# Everything else is read as text. Left to inference, a column such as
+# company_size turns float whenever its values look numeric, which can
+# differ from one read_csv chunk to the next.
+TEXT_DTYPES = {col: str for col in LEAD_COLUMNS if col not in INT_COLUMNS}
+
+CSV_IO_SECONDS = metrics.histogram("csv_io_seconds", "Time spent parsing or writing the leads CSV", ["op"])
+CSV_ROWS = metrics.counter("csv_rows_total", "Lead rows parsed from or written to the CSV", ["op"])
+CSV_SNAPSHOT_LOOKUPS = metrics.counter(
+    "csv_snapshot_lookups_total", "Reads served from the parsed snapshot (hit) or by re-parsing (miss)", ["result"]
+)
+
+
+class _Snapshot(NamedTuple):
+    """A parsed copy of the CSV as of one (mtime, size) of the file.
+    
+    Only the raw frame is kept; rows are cleaned and turned into records
+    when they are asked for.
+    """
+    stat: Tuple[int, int]
+    frame: pd.DataFrame  # raw read_csv output, in file order
+    ids: pd.Series  # the id column as numbers, NaN where invalid
+
+
+class LeadCSVWriter:
+    """Streams chunks of leads to a CSV without holding them all in memory.
+    
+    Rows go to a temporary file that replaces the target only when the
+    writer closes without an error, so readers never see a partial file.
+    """
+    
+    def __init__(self, csv_path: str, on_replace: Optional[Callable[[], None]] = None):
+        self.csv_path = csv_path
+        self.tmp_path = f"{csv_path}.tmp"
+        self.on_replace = on_replace
+        self._file = None
+        self._header = True
+        self.rows_written = 0
+    
+    def __enter__(self) -> "LeadCSVWriter":
+        self._file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+        return self
+    
+    def write(self, leads: List[Lead]) -> None:
+        """Append a chunk of leads."""
+        with CSV_IO_SECONDS.time(op="write"):
+            df = pd.DataFrame([lead.model_dump() for lead in leads], columns=LEAD_COLUMNS)
+            df.to_csv(self._file, index=False, header=self._header)
+        CSV_ROWS.inc(len(leads), op="write")
+        self._header = False
+        self.rows_written += len(leads)
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._header:
+            # Nothing written: still emit the header so the file stays valid
+            pd.DataFrame(columns=LEAD_COLUMNS).to_csv(self._file, index=False)
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.csv_path)
+            if self.on_replace:
+                self.on_replace()
+        else:
+            os.remove(self.tmp_path)
 
 
 class CSVHandler:
+    """Lead storage in a CSV file.
+    
+    Lookups are served from a parsed snapshot of the file that is kept
+    while the file's mtime and size are unchanged and dropped whenever
+    this handler writes. Lookups filter the snapshot's raw frame and only
+    build records for the rows they return. Files above ``csv_snapshot_max_bytes`` are read
+    from disk every time instead.
+    """
+    
     def __init__(self, csv_path: Optional[str] = None):
         self.csv_path = csv_path or settings.leads_csv_path
+        self._snapshot: Optional[_Snapshot] = None
+        self._generation = 0  # bumped on every write by this handler
+    
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def invalidate(self) -> None:
+        """Forget the cached snapshot after the file has been written."""
+        self._snapshot = None
+        self._generation += 1
+    
+    def version(self) -> Tuple[str, float]:
+        """(tag, last-modified timestamp) identifying the current contents."""
+        stat = self._stat() or (0, 0)
+        return f"{stat[0]:x}-{stat[1]:x}-{self._generation}", stat[0] / 1e9
+    
+    def _load_snapshot(self) -> Optional[_Snapshot]:
+        """The current snapshot, re-parsing the file if it has changed.
+        
+        Returns None when the file is missing or too large to cache.
+        """
+        stat = self._stat()
+        if stat is None or stat[1] > settings.csv_snapshot_max_bytes:
+            self._snapshot = None
+            return None
+        if self._snapshot is not None and self._snapshot.stat == stat:
+            CSV_SNAPSHOT_LOOKUPS.inc(result="hit")
+            return self._snapshot
+        
+        CSV_SNAPSHOT_LOOKUPS.inc(result="miss")
+        with CSV_IO_SECONDS.time(op="read"):
+            frame = pd.read_csv(self.csv_path, dtype=TEXT_DTYPES)
+            ids = pd.to_numeric(frame["id"], errors="coerce")
+        CSV_ROWS.inc(len(frame), op="read")
+        self._snapshot = _Snapshot(stat, frame, ids)
+        return self._snapshot
+    
+    def _snapshot_records(self, snapshot: _Snapshot, rows: Optional[np.ndarray] = None) -> List[dict]:
+        """Cleaned records for ``rows`` (positions in the file), or for every row."""
+        frame = snapshot.frame if rows is None else snapshot.frame.iloc[rows]
+        return self._to_records(self._clean_frame(frame.copy()))
+    
+    def _clean_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalise a raw leads DataFrame column by column.
+        
+        read_csv already maps empty cells and "nan" to NaN and reads all
+        but INT_COLUMNS as text, so the remaining work is coercing integer
+        columns once and turning NaN into None.
+        Non-numeric or non-integral values (e.g. a score of 50.5) become
+        None, so validation reports the row instead of the read failing.
+        """
+        for col in INT_COLUMNS:
+            if col in df.columns:
+                numbers = pd.to_numeric(df[col], errors="coerce")
+                df[col] = numbers.where(np.isfinite(numbers) & (numbers % 1 == 0)).astype("Int64")
+        if "status" in df.columns:
+            df["status"] = df["status"].fillna(LeadStatus.NEW.value)
+        
+        # NaN/NA -> None for every column in a single pass
+        return df.astype(object).where(df.notna(), None)
     
-    def read_leads(self) -> List[Lead]:
+    def _to_records(self, df: pd.DataFrame) -> List[dict]:
+        """Turn a cleaned DataFrame into dicts.
+        
+        Zipping whole-column lists is several times faster than
+        DataFrame.to_dict("records") on object columns.
+        """
+        columns = list(df.columns)
+        values = [df[col].tolist() for col in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+    
+    def _to_leads(self, records: List[dict], validate: bool = True) -> List[Lead]:
+        """Build Lead models from cleaned records.
+        
+        validate=False skips pydantic validation for trusted files. With
+        validation, rows that fail it are reported and left out.
+        """
+        if not validate:
+            return [Lead.model_construct(**record) for record in records]
+        leads = []
+        for record in records:
+            try:
+                leads.append(Lead.model_validate(record))
+            except ValidationError as e:
+                print(f"Skipping invalid lead row {record.get('id')}: {e.error_count()} validation error(s)")
+        return leads
+    
+    def read_leads(self, validate: bool = True) -> List[Lead]:
         """Read all leads from CSV file."""
         try:
-            df = pd.read_csv(self.csv_path)
-            
-            leads = []
-            for _, row in df.iterrows():
-                lead_dict = row.to_dict()
-                # Convert NaN, empty strings, and 'nan' to None
-                cleaned_dict = {}
-                for k, v in lead_dict.items():
-                    if pd.isna(v) or v == "" or v == "nan":
-                        cleaned_dict[k] = None
-                    else:
-                        cleaned_dict[k] = v
-                
-                leads.append(Lead(**cleaned_dict))
-            
-            return leads
+            snapshot = self._load_snapshot()
+            if snapshot is not None:
+                return self._to_leads(self._snapshot_records(snapshot), validate)
+            with CSV_IO_SECONDS.time(op="read"):
+                df = pd.read_csv(self.csv_path, dtype=TEXT_DTYPES)
+                records = self._to_records(self._clean_frame(df))
+            CSV_ROWS.inc(len(records), op="read")
+            return self._to_leads(records, validate)
         except FileNotFoundError:
             print(f"CSV file not found at {self.csv_path}")
             return []
@@ -35,23 +204,111 @@ class CSVHandler:
             print(f"Error reading CSV: {e}")
             return []
     
+    def iter_leads(self, chunksize: int = 1000, validate: bool = True) -> Iterator[List[Lead]]:
+        """Yield leads in chunks so large files never sit in memory at once."""
+        try:
+            reader = pd.read_csv(self.csv_path, dtype=TEXT_DTYPES, chunksize=chunksize)
+            while True:
+                # Time parsing only, not the consumer's work between chunks
+                with CSV_IO_SECONDS.time(op="read"):
+                    df = next(reader, None)
+                    if df is None:
+                        break
+                    records = self._to_records(self._clean_frame(df))
+                CSV_ROWS.inc(len(records), op="read")
+                yield self._to_leads(records, validate)
+        except FileNotFoundError:
+            print(f"CSV file not found at {self.csv_path}")
+    
+    def _query_mask(
+        self,
+        df: pd.DataFrame,
+        ids: pd.Series,
+        status: Optional[str],
+        priority: Optional[str],
+        min_score: Optional[int],
+        industry: Optional[str],
+        after_id: Optional[int]
+    ) -> pd.Series:
+        """Rows of a raw leads DataFrame that pass the query_leads filters."""
+        mask = ids.notna()
+        if after_id is not None:
+            mask &= ids > after_id
+        if status is not None:
+            mask &= df["status"].fillna(LeadStatus.NEW.value) == status
+        if priority is not None:
+            mask &= df["priority"] == priority
+        if min_score is not None:
+            mask &= pd.to_numeric(df["priority_score"], errors="coerce") >= min_score
+        if industry is not None:
+            mask &= df["industry"].astype(str).str.lower() == industry.lower()
+        return mask
+    
+    def query_leads(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        min_score: Optional[int] = None,
+        industry: Optional[str] = None,
+        after_id: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 100,
+        validate: bool = True
+    ) -> List[Lead]:
+        """One filtered page of leads in id order.
+        
+        Filters run on raw DataFrames, so only the page itself is turned
+        into Lead models. Without a snapshot the file is scanned in chunks,
+        keeping at most offset + limit matching rows between chunks.
+        """
+        filters = (status, priority, min_score, industry, after_id)
+        keep = offset + limit
+        
+        snapshot = self._load_snapshot()
+        if snapshot is not None:
+            matched = snapshot.ids[self._query_mask(snapshot.frame, snapshot.ids, *filters)]
+            page = matched.sort_values(kind="stable").index[offset:keep]
+            return self._to_leads(self._snapshot_records(snapshot, page.to_numpy()), validate)
+        
+        page = pd.DataFrame(columns=LEAD_COLUMNS)
+        try:
+            for df in pd.read_csv(self.csv_path, dtype=TEXT_DTYPES, chunksize=10_000):
+                ids = pd.to_numeric(df["id"], errors="coerce")
+                mask = self._query_mask(df, ids, *filters)
+                matches = df[mask].assign(_id=ids[mask])
+                page = pd.concat([page, matches]) if len(page) else matches
+                page = page.nsmallest(keep, "_id")
+        except FileNotFoundError:
+            print(f"CSV file not found at {self.csv_path}")
+            return []
+        
+        page = page.iloc[offset:keep].drop(columns="_id", errors="ignore")
+        records = self._to_records(self._clean_frame(page))
+        return self._to_leads(records, validate)
+    
+    def count(self) -> int:
+        """Count leads, reading only the id column."""
+        try:
+            return sum(
+                len(df) for df in pd.read_csv(self.csv_path, usecols=["id"], chunksize=100_000)
+            )
+        except FileNotFoundError:
+            return 0
+    
+    def open_writer(self) -> LeadCSVWriter:
+        """Open a streaming writer that replaces the CSV when closed."""
+        return LeadCSVWriter(self.csv_path, on_replace=self.invalidate)
+    
     def write_leads(self, leads: List[Lead]) -> bool:
         """Write all leads back to CSV file."""
         try:
-            # Convert leads to list of dicts
+            # Convert leads to list of dicts, in the column order of the original CSV
             data = [lead.model_dump() for lead in leads]
-            df = pd.DataFrame(data)
-            
-            # Define column order to match original CSV
-            columns = [
-                "id", "name", "email", "company", "job_title", 
-                "industry", "company_size", "location", "persona",
-                "priority", "priority_score", "priority_reason",
-                "status", "email_draft", "response_category"
-            ]
-            df = df[columns]
-            
-            df.to_csv(self.csv_path, index=False)
+            with CSV_IO_SECONDS.time(op="write"):
+                df = pd.DataFrame(data, columns=LEAD_COLUMNS)
+                df.to_csv(self.csv_path, index=False)
+            CSV_ROWS.inc(len(data), op="write")
+            self.invalidate()
             return True
         except Exception as e:
             print(f"Error writing CSV: {e}")
@@ -59,17 +316,54 @@ class CSVHandler:
     
     def update_lead(self, lead: Lead) -> bool:
         """Update a single lead in the CSV."""
-        leads = self.read_leads()
+        return self.update_leads([lead])
+    
+    def update_leads(self, leads: List[Lead]) -> bool:
+        """Update several leads with a single rewrite of the CSV.
         
-        for i, existing_lead in enumerate(leads):
-            if existing_lead.id == lead.id:
-                leads[i] = lead
-                return self.write_leads(leads)
+        Other rows are carried over unvalidated, so one bad row elsewhere
+        cannot block the update. Nothing is written if the file cannot be
+        read or any of ``leads`` is not in it.
+        """
+        updates = {lead.id: lead for lead in leads}
+        try:
+            snapshot = self._load_snapshot()
+            if snapshot is not None:
+                records = self._snapshot_records(snapshot)
+            else:
+                records = self._to_records(self._clean_frame(pd.read_csv(self.csv_path, dtype=TEXT_DTYPES)))
+        except Exception as e:
+            print(f"Error reading CSV, leads not updated: {e}")
+            return False
         
-        return False
+        missing = set(updates) - {record["id"] for record in records}
+        if missing:
+            print(f"Leads not in CSV, nothing updated: {sorted(missing)}")
+            return False
+        merged = [updates.get(lead.id, lead) for lead in self._to_leads(records, validate=False)]
+        return self.write_leads(merged)
+    
+    def get_leads_by_ids(self, lead_ids: List[int]) -> Dict[int, Lead]:
+        """Get several leads by ID with one read of the CSV."""
+        snapshot = self._load_snapshot()
+        if snapshot is not None:
+            rows = np.flatnonzero(snapshot.ids.isin(list(set(lead_ids))))
+            return {lead.id: lead for lead in self._to_leads(self._snapshot_records(snapshot, rows))}
+        wanted = set(lead_ids)
+        return {lead.id: lead for lead in self.read_leads() if lead.id in wanted}
     
     def get_lead_by_id(self, lead_id: int) -> Optional[Lead]:
         """Get a single lead by ID."""
+        snapshot = self._load_snapshot()
+        if snapshot is not None:
+            rows = np.flatnonzero(snapshot.ids.to_numpy() == lead_id)[:1]
+            if not len(rows):
+                return None
+            try:
+                return Lead.model_validate(self._snapshot_records(snapshot, rows)[0])
+            except ValidationError as e:
+                print(f"Invalid lead row {lead_id}: {e.error_count()} validation error(s)")
+                return None
         leads = self.read_leads()
         for lead in leads:
             if lead.id == lead_id:
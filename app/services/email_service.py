@@ -1,9 +1,17 @@
-import aiosmtplib
+import asyncio
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Tuple
 from app.config import settings
 from app.models import Lead
+from app.services.metrics import metrics
+from app.services.smtp_pool import SMTPConnectionPool
+
+
+SMTP_SEND_SECONDS = metrics.histogram(
+    "smtp_send_seconds", "Duration of send_email, including waiting for a pooled connection", ["outcome"]
+)
 
 
 class EmailService:
@@ -13,6 +21,32 @@ class EmailService:
         self.username = settings.smtp_username
         self.password = settings.smtp_password
         self.sender = settings.sender_email
+        # Reused connections; the pool size caps simultaneous SMTP sessions
+        self.pool = SMTPConnectionPool(
+            self.host,
+            self.port,
+            username=self.username,
+            password=self.password,
+            size=settings.smtp_max_concurrency,
+            max_messages=settings.smtp_max_messages_per_connection,
+            timeout=settings.smtp_timeout
+        )
+    
+    def _build_message(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        is_html: bool = False
+    ) -> MIMEMultipart:
+        message = MIMEMultipart("alternative")
+        message["From"] = self.sender
+        message["To"] = to_email
+        message["Subject"] = subject
+        
+        content_type = "html" if is_html else "plain"
+        message.attach(MIMEText(body, content_type))
+        return message
     
     async def send_email(
         self,
@@ -21,33 +55,32 @@ class EmailService:
         body: str,
         is_html: bool = False
     ) -> bool:
-        """Send an email via SMTP."""
+        """Send an email via a pooled SMTP connection."""
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["From"] = self.sender
-            message["To"] = to_email
-            message["Subject"] = subject
-            
-            # Attach body
-            content_type = "html" if is_html else "plain"
-            message.attach(MIMEText(body, content_type))
-            
-            # Send via SMTP
-            await aiosmtplib.send(
-                message,
-                hostname=self.host,
-                port=self.port,
-                username=self.username or None,
-                password=self.password or None,
-                use_tls=False,
-                start_tls=False
-            )
-            
+            message = self._build_message(to_email, subject, body, is_html)
+            await self.pool.send(message)
+            outcome = "ok"
             return True
         except Exception as e:
             print(f"Email send error: {e}")
             return False
+        finally:
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+    
+    async def send_bulk(self, emails: List[Tuple[str, str, str]]) -> List[bool]:
+        """Send many (to_email, subject, body) emails over the pool.
+        
+        Returns one success flag per message, in input order.
+        """
+        return list(await asyncio.gather(
+            *(self.send_email(to_email, subject, body) for to_email, subject, body in emails)
+        ))
+    
+    async def aclose(self) -> None:
+        """Close pooled SMTP connections."""
+        await self.pool.close()
     
     async def send_outreach_email(self, lead: Lead) -> bool:
         """Send an outreach email to a lead using their drafted email."""
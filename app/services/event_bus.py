@@ -0,0 +1,54 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+
+
+class EventBus:
+    """In-process pub/sub for campaign progress events.
+
+    Each subscriber gets its own bounded queue. Publishing never waits:
+    when a subscriber falls behind, its oldest queued event is dropped,
+    so slow clients cannot hold up the pipeline workers.
+    """
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Queue ``event`` for every subscriber without blocking."""
+        if not self._subscribers:
+            return
+        message = (event, data)
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+# Singleton instance
+event_bus = EventBus()
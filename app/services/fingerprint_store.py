@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from app.models import Lead
+from app.config import settings
+from app.services.sqlite_batches import in_batches
+from app.agents.email_drafter import FALLBACK_PITCH
+from app.agents.lead_enricher import DEFAULT_PERSONA
+from app.agents.lead_scorer import FALLBACK_REASON
+
+
+# Lead fields each stage reads, and the field it fills in
+STAGE_INPUTS = {
+    "score": ["name", "email", "company", "job_title", "industry", "company_size", "location"],
+    "enrich": ["company", "job_title", "industry", "company_size"],
+    "draft": ["name", "job_title", "company", "industry", "persona", "priority_reason"],
+}
+STAGE_OUTPUTS = {"score": "priority_score", "enrich": "persona", "draft": "email_draft"}
+
+
+def is_fallback(lead: Lead, stage: str) -> bool:
+    """Whether ``stage``'s output on ``lead`` is the default an agent writes on failure."""
+    if stage == "score":
+        return lead.priority_reason == FALLBACK_REASON
+    if stage == "enrich":
+        return lead.persona == DEFAULT_PERSONA
+    if stage == "draft":
+        return FALLBACK_PITCH in (lead.email_draft or "")
+    return False
+
+
+def fingerprint(lead: Lead, stage: str, product_description: Optional[str] = None) -> str:
+    """Hash the inputs ``stage`` would read from ``lead``."""
+    data = [getattr(lead, field) for field in STAGE_INPUTS[stage]]
+    if stage == "draft":
+        data.append(product_description)
+    raw = json.dumps(data, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """Remembers the stage inputs each lead was last processed with.
+
+    Incremental runs compare a lead's current inputs against these
+    fingerprints and skip stages whose inputs are unchanged.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or settings.fingerprint_db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lead_fingerprints ("
+            "lead_id INTEGER NOT NULL, stage TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "PRIMARY KEY (lead_id, stage))"
+        )
+        self._db.commit()
+
+    def load_many(self, lead_ids: Iterable[int]) -> Dict[int, Dict[str, str]]:
+        """Fetch stored fingerprints as {lead_id: {stage: fingerprint}}."""
+        result: Dict[int, Dict[str, str]] = {}
+        for batch, placeholders in in_batches(lead_ids):
+            with self._lock:
+                rows = self._db.execute(
+                    f"SELECT lead_id, stage, fingerprint FROM lead_fingerprints "
+                    f"WHERE lead_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+            for lead_id, stage, value in rows:
+                result.setdefault(lead_id, {})[stage] = value
+        return result
+
+    def save_many(
+        self,
+        completed: Iterable[Tuple[Lead, Iterable[str]]],
+        product_description: Optional[str] = None
+    ) -> None:
+        """Record the current inputs of the stages each lead completed.
+
+        ``completed`` pairs each lead with the stages that actually ran for
+        it. Stages that were skipped, failed or fell back to a default
+        output keep their previous fingerprint.
+        """
+        rows = [
+            (lead.id, stage, fingerprint(lead, stage, product_description))
+            for lead, stages in completed
+            for stage in stages
+            if stage in STAGE_OUTPUTS and getattr(lead, STAGE_OUTPUTS[stage]) and not is_fallback(lead, stage)
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO lead_fingerprints (lead_id, stage, fingerprint) VALUES (?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+
+
+def is_current(
+    lead: Lead,
+    stage: str,
+    stored: Dict[str, str],
+    product_description: Optional[str] = None
+) -> bool:
+    """Whether ``stage`` can be skipped for ``lead`` in an incremental run.
+
+    The stage's output must be present and not a fallback default, and
+    its inputs must match the stored fingerprint. Leads with output but
+    no fingerprint yet (e.g. processed before fingerprints existed) are
+    treated as current.
+    """
+    if not getattr(lead, STAGE_OUTPUTS[stage]) or is_fallback(lead, stage):
+        return False
+    if stage not in stored:
+        return True
+    return stored[stage] == fingerprint(lead, stage, product_description)
+
+
+# Singleton instance
+fingerprint_store = FingerprintStore()
@@ -0,0 +1,250 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.models import Lead
+from app.config import settings
+from app.services.csv_handler import CSVHandler, LEAD_COLUMNS, csv_handler
+from app.services.sqlite_batches import in_batches
+
+
+_COLUMN_TYPES = {"id": "INTEGER PRIMARY KEY", "priority_score": "INTEGER"}
+
+
+class _SQLiteLeadWriter:
+    """Writer counterpart of LeadCSVWriter; each chunk is upserted directly."""
+
+    def __init__(self, store: "SQLiteLeadStore"):
+        self.store = store
+        self.rows_written = 0
+
+    def __enter__(self) -> "_SQLiteLeadWriter":
+        return self
+
+    def write(self, leads: List[Lead]) -> None:
+        self.store.write_leads(leads)
+        self.rows_written += len(leads)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+class SQLiteLeadStore:
+    """Lead storage in SQLite with the same interface as CSVHandler.
+
+    Leads are indexed by id (primary key) and status, so point lookups and
+    single-lead updates stay constant-time as the list grows. CSV remains
+    the interchange format via import_csv/export_csv.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, csv_path: Optional[str] = None):
+        self.db_path = db_path or settings.lead_store_db_path
+        self.csv_path = csv_path or settings.leads_csv_path
+        self._lock = threading.Lock()
+        # Changes on every write; the start time keeps tags unique across restarts
+        self._generation = 0
+        self._modified = time.time()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        columns = ", ".join(f"{col} {_COLUMN_TYPES.get(col, 'TEXT')}" for col in LEAD_COLUMNS)
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS leads ({columns})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_leads_status ON leads (status)")
+        self._db.commit()
+
+        # Seed an empty database from the CSV on first start
+        if self.count() == 0 and os.path.exists(self.csv_path):
+            self.import_csv(self.csv_path)
+
+    def _to_lead(self, row: tuple, validate: bool = True) -> Lead:
+        record = dict(zip(LEAD_COLUMNS, row))
+        if validate:
+            return Lead(**record)
+        return Lead.model_construct(**record)
+
+    def _to_row(self, lead: Lead) -> tuple:
+        data = lead.model_dump()
+        return tuple(data[col] for col in LEAD_COLUMNS)
+
+    def _select(
+        self,
+        where: str = "",
+        params: tuple = (),
+        limit: Optional[int] = None,
+        validate: bool = True,
+        offset: int = 0
+    ) -> List[Lead]:
+        query = f"SELECT {', '.join(LEAD_COLUMNS)} FROM leads {where} ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params = params + (limit, offset)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [self._to_lead(row, validate) for row in rows]
+
+    def _touch(self) -> None:
+        self._generation += 1
+        self._modified = time.time()
+
+    def version(self) -> Tuple[str, float]:
+        """(tag, last-modified timestamp) identifying the current contents."""
+        return f"{int(self._modified * 1e6):x}-{self._generation}", self._modified
+
+    def count(self) -> int:
+        """Number of stored leads."""
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM leads").fetchone()
+        return count
+
+    def read_leads(self) -> List[Lead]:
+        """Read all leads."""
+        try:
+            return self._select()
+        except Exception as e:
+            print(f"Error reading lead store: {e}")
+            return []
+
+    def iter_leads(self, chunksize: int = 1000, validate: bool = True) -> Iterator[List[Lead]]:
+        """Yield leads in id order, one chunk at a time (keyset pagination)."""
+        last_id = None
+        while True:
+            if last_id is None:
+                chunk = self._select(limit=chunksize, validate=validate)
+            else:
+                chunk = self._select("WHERE id > ?", (last_id,), limit=chunksize, validate=validate)
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+
+    def query_leads(
+        self,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        min_score: Optional[int] = None,
+        industry: Optional[str] = None,
+        after_id: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 100,
+        validate: bool = True
+    ) -> List[Lead]:
+        """One filtered page of leads in id order."""
+        conditions, params = [], []
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if priority is not None:
+            conditions.append("priority = ?")
+            params.append(priority)
+        if min_score is not None:
+            conditions.append("priority_score >= ?")
+            params.append(min_score)
+        if industry is not None:
+            conditions.append("LOWER(industry) = LOWER(?)")
+            params.append(industry)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._select(where, tuple(params), limit=limit, validate=validate, offset=offset)
+
+    def open_writer(self) -> _SQLiteLeadWriter:
+        """Streaming writer with the same interface as CSVHandler.open_writer."""
+        return _SQLiteLeadWriter(self)
+
+    def write_leads(self, leads: List[Lead]) -> bool:
+        """Insert or replace the given leads (leads not passed are kept)."""
+        placeholders = ", ".join("?" for _ in LEAD_COLUMNS)
+        try:
+            with self._lock:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO leads ({', '.join(LEAD_COLUMNS)}) VALUES ({placeholders})",
+                    [self._to_row(lead) for lead in leads]
+                )
+                self._db.commit()
+                self._touch()
+            return True
+        except Exception as e:
+            print(f"Error writing lead store: {e}")
+            return False
+
+    def update_lead(self, lead: Lead) -> bool:
+        """Update a single lead in place."""
+        assignments = ", ".join(f"{col} = ?" for col in LEAD_COLUMNS[1:])
+        row = self._to_row(lead)
+        try:
+            with self._lock:
+                cursor = self._db.execute(
+                    f"UPDATE leads SET {assignments} WHERE id = ?",
+                    row[1:] + (lead.id,)
+                )
+                self._db.commit()
+                self._touch()
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error updating lead {lead.id}: {e}")
+            return False
+
+    def update_leads(self, leads: List[Lead]) -> bool:
+        """Update several existing leads in one transaction.
+        
+        Nothing is updated if any of ``leads`` is not in the store.
+        """
+        assignments = ", ".join(f"{col} = ?" for col in LEAD_COLUMNS[1:])
+        try:
+            with self._lock:
+                cursor = self._db.executemany(
+                    f"UPDATE leads SET {assignments} WHERE id = ?",
+                    [self._to_row(lead)[1:] + (lead.id,) for lead in leads]
+                )
+                # rowcount is summed over every UPDATE
+                if cursor.rowcount < len(leads):
+                    self._db.rollback()
+                    print(f"{len(leads) - cursor.rowcount} lead(s) not in store, nothing updated")
+                    return False
+                self._db.commit()
+                self._touch()
+            return True
+        except Exception as e:
+            print(f"Error updating leads: {e}")
+            return False
+
+    def get_leads_by_ids(self, lead_ids: List[int]) -> Dict[int, Lead]:
+        """Get several leads by ID."""
+        found: Dict[int, Lead] = {}
+        for batch, placeholders in in_batches(lead_ids):
+            for lead in self._select(f"WHERE id IN ({placeholders})", tuple(batch)):
+                found[lead.id] = lead
+        return found
+
+    def get_lead_by_id(self, lead_id: int) -> Optional[Lead]:
+        """Get a single lead by ID."""
+        leads = self._select("WHERE id = ?", (lead_id,))
+        return leads[0] if leads else None
+
+    def get_leads_by_status(self, status: str) -> List[Lead]:
+        """Get all leads with a specific status."""
+        return self._select("WHERE status = ?", (status,))
+
+    def import_csv(self, csv_path: Optional[str] = None) -> int:
+        """Load leads from a CSV file, replacing rows with the same id."""
+        leads = CSVHandler(csv_path or self.csv_path).read_leads()
+        self.write_leads(leads)
+        return len(leads)
+
+    def export_csv(self, csv_path: Optional[str] = None) -> bool:
+        """Write every stored lead to a CSV file."""
+        return CSVHandler(csv_path or self.csv_path).write_leads(self.read_leads())
+
+
+def create_lead_store():
+    """Build the lead store selected by LEAD_STORE_BACKEND."""
+    if settings.lead_store_backend == "sqlite":
+        return SQLiteLeadStore()
+    return csv_handler
+
+
+# Singleton instance
+lead_store = create_lead_store()
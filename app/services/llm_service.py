@@ -1,22 +1,159 @@
 import httpx
 import asyncio
-from typing import Optional
+import json
+import re
+import time
+from typing import Any, Optional, Type, TypeVar
+from pydantic import BaseModel
 from app.config import settings
+from app.services.llm_cache import LLMCache
+from app.services.metrics import metrics
+from app.services.rate_limiter import RateLimiter, parse_retry_after
+from app.services.token_budget import TokenBudget, TokenBudgetExceeded
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "llm_request_seconds", "Duration of each LLM HTTP attempt", ["outcome"]
+)
+LLM_WAIT_SECONDS = metrics.histogram(
+    "llm_wait_seconds", "Time an attempt waited for the rate limiter and a concurrency slot"
+)
+LLM_RETRIES = metrics.counter("llm_retries_total", "LLM attempts that were retried", ["reason"])
+LLM_RATE_LIMITED = metrics.counter("llm_rate_limited_total", "429 responses from the LLM API")
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "Tokens reported in LLM response usage", ["call_type", "kind"]
+)
+LLM_CACHE_LOOKUPS = metrics.counter("llm_cache_lookups_total", "LLM response cache lookups", ["result"])
+LLM_JSON_RESPONSES = metrics.counter(
+    "llm_json_responses_total",
+    "Structured LLM replies: ok, repaired (valid after one repair call) or failed",
+    ["call_type", "result"]
+)
+
+# max_tokens per kind of call. Scoring and classification reply with
+# small JSON; drafts are capped at ~150 words. "score_batch" is per lead.
+MAX_TOKENS_PROFILES = {
+    "score": 200,
+    "score_batch": 120,
+    "enrich": 300,
+    "draft": 400,
+    "classify": 100,
+    "insights": 600,
+    "default": 1024,
+}
+
+
+def max_tokens_for(call_type: str, items: int = 1) -> int:
+    """max_tokens for ``call_type``, scaled by ``items`` for batched calls."""
+    return MAX_TOKENS_PROFILES.get(call_type, MAX_TOKENS_PROFILES["default"]) * max(1, items)
+
+
+REPAIR_SYSTEM_PROMPT = """You fix malformed JSON produced by another model.
+
+Return ONLY the corrected JSON, keeping the original values wherever they are valid."""
+
+# Characters of a bad reply quoted back in a repair call
+REPAIR_MAX_CHARS = 4000
+
+_JSON_START = re.compile(r"[{\[]")
+_decoder = json.JSONDecoder()
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class StructuredOutputError(ValueError):
+    """The LLM reply was empty, or still invalid after a repair call."""
+
+
+def extract_json(text: str) -> Any:
+    """Decode the first complete JSON object or array in ``text``.
+    
+    Code fences and prose around the JSON are skipped in a single scan
+    rather than stripped first: decoding starts at each "{" or "[" in
+    turn until one begins a valid value.
+    """
+    for match in _JSON_START.finditer(text):
+        try:
+            return _decoder.raw_decode(text, match.start())[0]
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("no JSON value found in response")
+
+
+def _parse_reply(text: str, schema: Optional[Type[ModelT]]) -> Any:
+    data = extract_json(text)
+    return schema.model_validate(data) if schema is not None else data
 
 
 class LLMService:
-    def __init__(self):
-        self.api_key = settings.groq_api_key
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
-        self.model = "llama-3.1-8b-instant"
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None):
+        self.api_key = api_key if api_key is not None else settings.groq_api_key
+        self.base_url = base_url or settings.llm_base_url
+        self.model = settings.llm_model
+        self.temperature = 0.7
+        # Caps in-flight requests so concurrent pipeline workers queue here
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        self.rate_limiter = RateLimiter(settings.llm_requests_per_minute)
+        self.budget = TokenBudget(settings.llm_tokens_per_minute)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache: Optional[LLMCache] = None
+        if settings.llm_cache_enabled:
+            self.cache = LLMCache(
+                settings.llm_cache_path or None,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                memory_max_entries=settings.llm_cache_memory_entries,
+                disk_max_entries=settings.llm_cache_disk_entries,
+            )
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared pooled client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=settings.llm_timeout,
+                http2=settings.llm_http2 and HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_keepalive_connections,
+                ),
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+    
+    def _cache_key(self, prompt: str, system_prompt: Optional[str], max_tokens: int) -> str:
+        return LLMCache.make_key(self.model, system_prompt, prompt, self.temperature, max_tokens)
     
     async def generate(
         self, 
         prompt: str, 
         system_prompt: Optional[str] = None,
-        max_retries: int = 5
+        max_retries: int = 5,
+        use_cache: bool = True,
+        call_type: str = "default",
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
     ) -> str:
-        """Generate a response from the LLM with retry logic."""
+        """Generate a response from the LLM with retry logic.
+        
+        Identical requests are answered from the response cache when enabled.
+        ``call_type`` selects the max_tokens profile (unless ``max_tokens``
+        is given) and labels token usage. ``json_mode`` asks the provider
+        for a JSON object reply. Raises TokenBudgetExceeded once the
+        campaign's token budget is used up, so callers can leave the lead
+        untouched instead of writing a fallback.
+        """
         messages = []
         
         if system_prompt:
@@ -24,57 +161,166 @@ class LLMService:
         
         messages.append({"role": "user", "content": prompt})
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            # An empty bearer token is an illegal header; local stand-ins need none
+            headers["Authorization"] = f"Bearer {self.api_key}"
         
         payload = {
             "model": self.model,
             "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": 1024
+            "temperature": self.temperature,
+            "max_tokens": max_tokens or max_tokens_for(call_type)
         }
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        # Rough prompt size (~4 characters per token) plus the reply cap
+        estimate = (len(prompt) + len(system_prompt or "")) // 4 + payload["max_tokens"]
+        
+        cache_key = None
+        if use_cache and self.cache is not None:
+            cache_key = self._cache_key(prompt, system_prompt, payload["max_tokens"])
+            cached = self.cache.get(cache_key)
+            LLM_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
         
         for attempt in range(max_retries):
+            outcome = "error"
+            sent = finished = None
+            reserved = False
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
+                waiting = time.perf_counter()
+                await self.budget.acquire(estimate)
+                reserved = True
+                await self.rate_limiter.acquire()
+                client = self._get_client()
+                async with self._semaphore:
+                    sent = time.perf_counter()
+                    LLM_WAIT_SECONDS.observe(sent - waiting)
                     response = await client.post(
                         self.base_url,
                         headers=headers,
                         json=payload
                     )
-                    
-                    # Handle rate limiting
-                    if response.status_code == 429:
-                        wait_time = (2 ** attempt) + 1  # Exponential backoff: 2, 3, 5, 9, 17 seconds
-                        print(f"Rate limited. Waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    return data["choices"][0]["message"]["content"]
+                    finished = time.perf_counter()
+                self.rate_limiter.update_from_headers(response.headers)
+                
+                # Handle rate limiting: honour Retry-After, else exponential backoff.
+                # Pausing the limiter holds back every caller, not just this one.
+                if response.status_code == 429:
+                    outcome = "rate_limited"
+                    LLM_RATE_LIMITED.inc()
+                    if attempt < max_retries - 1:
+                        LLM_RETRIES.inc(reason="rate_limited")
+                    wait_time = parse_retry_after(response.headers.get("retry-after"))
+                    if wait_time is None:
+                        wait_time = (2 ** attempt) + 1  # 2, 3, 5, 9, 17 seconds
+                    print(f"Rate limited. Waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}")
+                    self.rate_limiter.pause(wait_time)
+                    continue
+                
+                response.raise_for_status()
+                data = response.json()
+                content = data["choices"][0]["message"]["content"]
+                outcome = "ok"
+                usage = data.get("usage") or {}
+                prompt_tokens = int(usage.get("prompt_tokens") or 0)
+                completion_tokens = int(usage.get("completion_tokens") or 0)
+                self.budget.record(prompt_tokens, completion_tokens)
+                LLM_TOKENS.inc(prompt_tokens, call_type=call_type, kind="prompt")
+                LLM_TOKENS.inc(completion_tokens, call_type=call_type, kind="completion")
+                if cache_key is not None and content:
+                    self.cache.set(cache_key, content)
+                return content
                     
             except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = (2 ** attempt) + 1
-                    print(f"Rate limited. Waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                    await asyncio.sleep(wait_time)
-                    continue
+                outcome = "http_error"
                 print(f"HTTP error: {e.response.status_code} - {e.response.text}")
                 return ""
+            except TokenBudgetExceeded:
+                raise
             except Exception as e:
                 print(f"LLM error: {e}")
                 return ""
+            finally:
+                if reserved:
+                    self.budget.release(estimate)
+                if sent is not None:
+                    LLM_REQUEST_SECONDS.observe((finished or time.perf_counter()) - sent, outcome=outcome)
         
         print("Max retries exceeded")
         return ""
     
-    async def generate_json(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Generate a JSON response from the LLM."""
+    async def generate_json(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        schema: Optional[Type[ModelT]] = None,
+        call_type: str = "default",
+        max_tokens: Optional[int] = None
+    ) -> Any:
+        """Generate a JSON reply and parse it, validated against ``schema`` if given.
+        
+        Returns the schema instance (or the decoded JSON without a schema).
+        A reply that fails to parse or validate gets one repair call that
+        shows the model its output and the error. Only replies that pass
+        validation are cached. Raises StructuredOutputError if the reply is
+        empty or the repair fails too.
+        """
         json_system = (system_prompt or "") + "\n\nRespond ONLY with valid JSON. No explanations or markdown."
-        return await self.generate(prompt, json_system)
+        max_tokens = max_tokens or max_tokens_for(call_type)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(prompt, json_system, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                try:
+                    result = _parse_reply(cached, schema)
+                    LLM_CACHE_LOOKUPS.inc(result="hit")
+                    return result
+                except ValueError:
+                    pass  # written before replies were validated; fetch a fresh one
+            LLM_CACHE_LOOKUPS.inc(result="miss")
+        
+        response = await self.generate(
+            prompt, json_system, use_cache=False,
+            call_type=call_type, max_tokens=max_tokens, json_mode=settings.llm_json_mode
+        )
+        if not response:
+            LLM_JSON_RESPONSES.inc(call_type=call_type, result="failed")
+            raise StructuredOutputError("empty response from LLM")
+        try:
+            result = _parse_reply(response, schema)
+            LLM_JSON_RESPONSES.inc(call_type=call_type, result="ok")
+            if cache_key is not None:
+                self.cache.set(cache_key, response)
+            return result
+        except ValueError as e:  # JSON and pydantic validation errors alike
+            error = e
+        
+        print(f"Invalid JSON for {call_type} call, repairing: {str(error).splitlines()[0]}")
+        repair_prompt = f"""This reply was supposed to be valid JSON but failed with:
+{str(error)[:500]}
+
+Reply:
+{response[:REPAIR_MAX_CHARS]}"""
+        if schema is not None:
+            repair_prompt += f"\n\nIt must match this JSON schema:\n{json.dumps(schema.model_json_schema())}"
+        repaired = await self.generate(
+            repair_prompt, REPAIR_SYSTEM_PROMPT, use_cache=False,
+            call_type="repair", max_tokens=max_tokens, json_mode=settings.llm_json_mode
+        )
+        try:
+            result = _parse_reply(repaired, schema)
+        except ValueError as e:
+            LLM_JSON_RESPONSES.inc(call_type=call_type, result="failed")
+            raise StructuredOutputError(f"invalid JSON after repair: {str(e).splitlines()[0]}") from e
+        
+        LLM_JSON_RESPONSES.inc(call_type=call_type, result="repaired")
+        if cache_key is not None:
+            self.cache.set(cache_key, repaired)
+        return result
 
 
 # Singleton instance
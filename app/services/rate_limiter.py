@@ -0,0 +1,108 @@
+import asyncio
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a provider reset duration such as '7.66s', '2m59.56s' or '250ms'."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    """Token bucket that adapts to the provider's rate-limit headers.
+
+    Tokens refill at ``requests_per_minute`` and each request consumes one.
+    When the provider reports an exhausted quota or answers 429, the bucket
+    is paused until the advertised reset time so callers wait instead of
+    spending retries.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        self.max_rate = max(requests_per_minute, 1.0) / 60.0
+        self.rate = self.max_rate
+        self.capacity = float(burst or max(1, int(requests_per_minute // 10)))
+        self.tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Block all callers for ``seconds`` (e.g. after a 429)."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self.tokens = 0.0
+        self._updated_at = now
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adjust the bucket from x-ratelimit-* headers on a provider response."""
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if remaining is None or reset is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+
+            if remaining <= 0:
+                self.pause(reset)
+            elif kind == "requests" and reset > 0:
+                # Never send faster than the remaining quota can sustain
+                self.rate = min(self.max_rate, max(remaining / reset, self.max_rate / 10))
@@ -1,45 +1,78 @@
+import asyncio
 import os
+import tempfile
+from collections import OrderedDict
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from app.models import Lead, CampaignStats
 from app.services.llm_service import llm_service
 from app.config import settings
 
 
+# Lead rows are kept in memory up to this size, then spill to disk
+ROW_SPOOL_MAX_BYTES = 1024 * 1024
+
+# Insights kept for this many distinct stats snapshots
+INSIGHTS_CACHE_SIZE = 32
+
+INSIGHTS_PENDING = "*AI insights are still being generated and will be filled in when ready.*"
+INSIGHTS_UNAVAILABLE = "*AI insights are unavailable right now.*"
+
+
+def tally_lead(stats: CampaignStats, lead: Lead, sign: int = 1) -> None:
+    """Add one lead's contribution to ``stats`` (or remove it, with sign=-1).
+    
+    Only ``lead.status`` and ``lead.priority`` are read. response_rate is
+    not touched; call update_response_rate afterwards.
+    """
+    stats.total_leads += sign
+    if lead.status == "contacted":
+        stats.leads_contacted += sign
+    if lead.status == "responded":
+        stats.leads_responded += sign
+    
+    if lead.priority == "high":
+        stats.high_priority += sign
+    elif lead.priority == "medium":
+        stats.medium_priority += sign
+    elif lead.priority == "low":
+        stats.low_priority += sign
+
+
+def update_response_rate(stats: CampaignStats) -> CampaignStats:
+    stats.response_rate = 0.0
+    if stats.leads_contacted > 0:
+        stats.response_rate = (stats.leads_responded / stats.leads_contacted) * 100
+    return stats
+
+
+def _pct(count: int, total: int) -> float:
+    return count / total * 100 if total else 0.0
+
+
+def _lead_row(lead: Lead) -> str:
+    return f"| {lead.name} | {lead.company or 'N/A'} | {lead.job_title or 'N/A'} | {lead.priority or 'N/A'} | {lead.priority_score or 'N/A'} | {lead.status} |\n"
+
+
 class ReportGenerator:
     def __init__(self):
         self.reports_path = settings.reports_path
+        self._insights: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._insight_tasks: Dict[Tuple, asyncio.Task] = {}
+        self._fill_in_tasks: Set[asyncio.Task] = set()
     
-    def calculate_stats(self, leads: List[Lead]) -> CampaignStats:
+    def calculate_stats(self, leads: Iterable[Lead]) -> CampaignStats:
         """Calculate campaign statistics from leads."""
         stats = CampaignStats()
-        stats.total_leads = len(leads)
-        
         for lead in leads:
-            if lead.status == "contacted":
-                stats.leads_contacted += 1
-            if lead.status == "responded":
-                stats.leads_responded += 1
-            
-            if lead.priority == "high":
-                stats.high_priority += 1
-            elif lead.priority == "medium":
-                stats.medium_priority += 1
-            elif lead.priority == "low":
-                stats.low_priority += 1
-        
-        if stats.leads_contacted > 0:
-            stats.response_rate = (stats.leads_responded / stats.leads_contacted) * 100
-        
-        return stats
+            tally_lead(stats, lead)
+        return update_response_rate(stats)
     
-    async def generate_report(self, leads: List[Lead]) -> str:
-        """Generate a markdown campaign report with AI insights."""
-        stats = self.calculate_stats(leads)
-        
+    async def _generate_insights(self, stats: CampaignStats, sample: List[Lead]) -> str:
+        """Ask the LLM for insights on the campaign stats."""
         # Build lead summary for AI analysis
         lead_summaries = []
-        for lead in leads[:10]:  # Limit to first 10 for AI context
+        for lead in sample:
             lead_summaries.append(
                 f"- {lead.name} ({lead.job_title} at {lead.company}): "
                 f"Priority={lead.priority}, Status={lead.status}"
@@ -62,15 +95,95 @@ Sample Leads:
 
 Provide actionable insights for the sales team."""
 
-        ai_insights = await llm_service.generate(
+        return await llm_service.generate(
             insights_prompt,
-            "You are a sales analytics expert. Provide brief, actionable insights."
+            "You are a sales analytics expert. Provide brief, actionable insights.",
+            call_type="insights"
         )
+    
+    async def _compute_insights(self, key: Tuple, stats: CampaignStats, sample: List[Lead]) -> str:
+        try:
+            insights = await self._generate_insights(stats, sample)
+            if insights:
+                self._insights[key] = insights
+                while len(self._insights) > INSIGHTS_CACHE_SIZE:
+                    self._insights.popitem(last=False)
+            return insights
+        finally:
+            del self._insight_tasks[key]
+    
+    @staticmethod
+    def _log_insights_error(task: asyncio.Task) -> None:
+        # Retrieves the error even when every report stopped waiting for it
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Insights error: {task.exception()}")
+    
+    async def get_insights(
+        self,
+        stats: CampaignStats,
+        sample: List[Lead],
+        deadline: Optional[float] = None,
+        on_pending: Optional[Callable[[asyncio.Task], None]] = None
+    ) -> str:
+        """Insights for this stats snapshot, waiting at most ``deadline`` seconds.
+        
+        Generation runs as a background task and is cached per snapshot.
+        If the deadline passes, INSIGHTS_PENDING is returned and the still
+        running task is handed to ``on_pending``.
+        """
+        key = tuple(stats.model_dump().values())
+        if key in self._insights:
+            self._insights.move_to_end(key)
+            return self._insights[key]
         
-        # Build the report
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        task = self._insight_tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute_insights(key, stats.model_copy(), list(sample)))
+            task.add_done_callback(self._log_insights_error)
+            self._insight_tasks[key] = task
         
-        report = f"""# Sales Campaign Report
+        if deadline is None:
+            deadline = settings.report_insights_deadline
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline) or INSIGHTS_UNAVAILABLE
+        except asyncio.TimeoutError:
+            if on_pending:
+                on_pending(task)
+            return INSIGHTS_PENDING
+        except Exception:
+            return INSIGHTS_UNAVAILABLE
+    
+    async def render_report(
+        self,
+        lead_chunks: Iterable[List[Lead]],
+        on_insights_pending: Optional[Callable[[asyncio.Task], None]] = None
+    ) -> AsyncIterator[str]:
+        """Render the markdown report piece by piece.
+        
+        Stats and lead rows are produced in a single pass over the chunks.
+        Rows are spooled to a temporary file (in memory while small), since
+        the stats sections come first in the report, so memory stays flat
+        however many leads there are. The numeric sections are yielded
+        before waiting (up to the configured deadline) for AI insights;
+        if they miss it, a placeholder is rendered and the insights task is
+        handed to ``on_insights_pending``.
+        """
+        stats = CampaignStats()
+        sample: List[Lead] = []
+        
+        with tempfile.SpooledTemporaryFile(max_size=ROW_SPOOL_MAX_BYTES, mode="w+", encoding="utf-8") as rows:
+            for chunk in lead_chunks:
+                for lead in chunk:
+                    tally_lead(stats, lead)
+                    rows.write(_lead_row(lead))
+                if len(sample) < 10:  # Limit to first 10 for AI context
+                    sample.extend(chunk[:10 - len(sample)])
+            update_response_rate(stats)
+            
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            total = stats.total_leads
+            
+            yield f"""# Sales Campaign Report
 
 **Generated:** {timestamp}
 
@@ -89,15 +202,18 @@ Provide actionable insights for the sales team."""
 
 | Priority | Count | Percentage |
 |----------|-------|------------|
-| High | {stats.high_priority} | {(stats.high_priority/stats.total_leads*100):.1f}% |
-| Medium | {stats.medium_priority} | {(stats.medium_priority/stats.total_leads*100):.1f}% |
-| Low | {stats.low_priority} | {(stats.low_priority/stats.total_leads*100):.1f}% |
+| High | {stats.high_priority} | {_pct(stats.high_priority, total):.1f}% |
+| Medium | {stats.medium_priority} | {_pct(stats.medium_priority, total):.1f}% |
+| Low | {stats.low_priority} | {_pct(stats.low_priority, total):.1f}% |
 
 ---
 
 ## AI-Generated Insights
 
-{ai_insights}
+"""
+            
+            ai_insights = await self.get_insights(stats, sample, on_pending=on_insights_pending)
+            yield f"""{ai_insights}
 
 ---
 
@@ -106,19 +222,62 @@ Provide actionable insights for the sales team."""
 | Name | Company | Title | Priority | Score | Status |
 |------|---------|-------|----------|-------|--------|
 """
+            
+            # Add lead rows
+            rows.seek(0)
+            while True:
+                block = rows.read(64 * 1024)
+                if not block:
+                    break
+                yield block
         
-        # Add lead rows
-        for lead in leads:
-            report += f"| {lead.name} | {lead.company or 'N/A'} | {lead.job_title or 'N/A'} | {lead.priority or 'N/A'} | {lead.priority_score or 'N/A'} | {lead.status} |\n"
-        
-        report += "\n---\n\n*Report generated by AI Sales CRM*\n"
-        
-        return report
+        yield "\n---\n\n*Report generated by AI Sales CRM*\n"
+    
+    async def generate_report(self, leads: List[Lead]) -> str:
+        """Generate a markdown campaign report with AI insights."""
+        return "".join([piece async for piece in self.render_report([leads])])
     
     async def save_report(self, leads: List[Lead]) -> str:
         """Generate and save the report to a file."""
-        report_content = await self.generate_report(leads)
+        return await self.save_report_chunks([leads])
+    
+    def _patch_insights(self, filepath: str, insights: str) -> None:
+        """Replace the INSIGHTS_PENDING line of a saved report with ``insights``."""
+        tmp_path = f"{filepath}.tmp"
+        replaced = False
+        try:
+            with open(filepath, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+                for line in src:
+                    if not replaced and line.rstrip("\n") == INSIGHTS_PENDING:
+                        line = f"{insights}\n"
+                        replaced = True
+                    dst.write(line)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if replaced:
+            os.replace(tmp_path, filepath)
+        else:
+            os.remove(tmp_path)
+    
+    async def _fill_in_insights(self, filepath: str, task: asyncio.Task) -> None:
+        """Wait for ``task`` and write its insights into the saved report."""
+        await asyncio.wait({task})
+        insights = None  # a failure is logged by _log_insights_error
+        if not task.cancelled() and task.exception() is None:
+            insights = task.result()
+        try:
+            self._patch_insights(filepath, insights or INSIGHTS_UNAVAILABLE)
+        except OSError as e:
+            print(f"Could not fill in insights for {filepath}: {e}")
+    
+    async def save_report_chunks(self, lead_chunks: Iterable[List[Lead]]) -> str:
+        """Stream a report for chunked leads straight to a file.
         
+        Insights that miss the deadline are written into the file in the
+        background once they are ready.
+        """
         # Ensure reports directory exists
         os.makedirs(self.reports_path, exist_ok=True)
         
@@ -127,8 +286,15 @@ Provide actionable insights for the sales team."""
         filename = f"campaign_report_{timestamp}.md"
         filepath = os.path.join(self.reports_path, filename)
         
+        pending: List[asyncio.Task] = []
         with open(filepath, "w", encoding="utf-8") as f:
-            f.write(report_content)
+            async for piece in self.render_report(lead_chunks, on_insights_pending=pending.append):
+                f.write(piece)
+        
+        for task in pending:
+            fill_in = asyncio.create_task(self._fill_in_insights(filepath, task))
+            self._fill_in_tasks.add(fill_in)
+            fill_in.add_done_callback(self._fill_in_tasks.discard)
         
         print(f"Report saved to: {filepath}")
         return filepath
@@ -0,0 +1,109 @@
+import asyncio
+import aiosmtplib
+from email.message import Message
+from typing import List, Optional, Tuple
+
+
+# Errors that mean the connection is gone and the send is worth retrying
+_RECONNECT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    ConnectionError,
+)
+
+
+class SMTPConnectionPool:
+    """Keeps a few authenticated SMTP connections open and reuses them.
+
+    Each send borrows an idle connection (or opens one if fewer than
+    ``size`` exist), and returns it afterwards. Connections are recycled
+    after ``max_messages`` sends, and a stale connection is replaced and
+    the send retried once.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 2,
+        max_messages: int = 100,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.size = max(1, size)
+        self.max_messages = max_messages
+        self.timeout = timeout
+
+        # Idle connections with the number of messages sent on each
+        self._idle: List[Tuple[aiosmtplib.SMTP, int]] = []
+        self._semaphore = asyncio.Semaphore(self.size)
+
+        self.connections_opened = 0
+        self.reconnects = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            timeout=self.timeout,
+            use_tls=False,
+            start_tls=False
+        )
+        await smtp.connect()
+        if self.username:
+            try:
+                await smtp.login(self.username, self.password or "")
+            except Exception:
+                # The caller never sees this connection, so close it here
+                smtp.close()
+                raise
+        self.connections_opened += 1
+        return smtp
+
+    async def _discard(self, smtp: Optional[aiosmtplib.SMTP]) -> None:
+        if smtp is None:
+            return
+        try:
+            if smtp.is_connected:
+                await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def send(self, message: Message) -> None:
+        """Send one message over a pooled connection."""
+        async with self._semaphore:
+            smtp, sent = self._idle.pop() if self._idle else (None, 0)
+
+            for attempt in range(2):
+                try:
+                    if smtp is None or not smtp.is_connected:
+                        smtp, sent = await self._connect(), 0
+                    await smtp.send_message(message)
+                    sent += 1
+                    break
+                except _RECONNECT_ERRORS:
+                    await self._discard(smtp)
+                    smtp = None
+                    if attempt == 1:
+                        raise
+                    self.reconnects += 1
+                except Exception:
+                    # Unknown connection state after a failed transaction
+                    await self._discard(smtp)
+                    raise
+
+            if sent >= self.max_messages:
+                await self._discard(smtp)
+            else:
+                self._idle.append((smtp, sent))
+
+    async def close(self) -> None:
+        """Quit every idle connection."""
+        idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            await self._discard(smtp)
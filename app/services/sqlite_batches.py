@@ -0,0 +1,17 @@
+from typing import Iterable, Iterator, List, Tuple
+
+
+# Stay below SQLite's bound-parameter limit
+MAX_IN_PARAMS = 500
+
+
+def in_batches(values: Iterable) -> Iterator[Tuple[List, str]]:
+    """Split ``values`` for ``WHERE col IN (...)`` queries.
+
+    Yields (batch, placeholders), where placeholders is "?, ?, ..." with
+    one "?" per value in the batch.
+    """
+    values = list(values)
+    for start in range(0, len(values), MAX_IN_PARAMS):
+        batch = values[start:start + MAX_IN_PARAMS]
+        yield batch, ", ".join("?" for _ in batch)
@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class Stage(Generic[T]):
+    """One step of a StageGraph.
+
+    ``run`` receives a batch of up to ``batch_size`` items. ``needed``
+    (optional) is checked once the stage's dependencies are done; items
+    that do not need the stage skip its queue entirely. With ``priority``,
+    queued items are taken highest-priority first (evaluated when the
+    item enters the queue); otherwise in arrival order.
+    """
+    name: str
+    run: Callable[[List[T]], Awaitable[None]]
+    depends_on: Tuple[str, ...] = ()
+    workers: int = 1
+    batch_size: int = 1
+    needed: Optional[Callable[[T], bool]] = None
+    priority: Optional[Callable[[T], float]] = None
+
+
+class StageGraph(Generic[T]):
+    """Runs items through a DAG of stages, each with its own queue and workers.
+
+    An item enters a stage as soon as every stage it depends on is done
+    for that item, so independent stages overlap and a slow stage only
+    backs up its own queue. When a stage raises for an item, the item's
+    downstream stages are skipped. Once ``should_stop`` returns True, no
+    further stage work starts: queued and newly ready items pass through
+    their remaining stages without running them. Errors raised by the
+    ``needed``, ``priority``, ``should_stop`` or ``on_item_done`` callbacks
+    are reported and fail the item (``should_stop`` errors stop the run),
+    so a run always finishes.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage[T]],
+        on_item_done: Optional[Callable[[T], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.on_item_done = on_item_done
+        self.should_stop = should_stop or (lambda: False)
+        self._dependents: Dict[str, List[str]] = {name: [] for name in self.stages}
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dependency}")
+                self._dependents[dependency].append(stage.name)
+        self._roots = [stage.name for stage in stages if not stage.depends_on]
+
+    def _stopping(self) -> bool:
+        try:
+            return self.should_stop()
+        except Exception as e:
+            print(f"should_stop failed, stopping: {e}")
+            return True
+
+    async def run(self, items: Sequence[T]) -> None:
+        """Process every item through every stage; returns when all are done."""
+        if not items:
+            return
+
+        # Heaps of (-priority, arrival, item index)
+        queues = {name: asyncio.PriorityQueue() for name in self.stages}
+        arrival = itertools.count()
+        done: List[Set[str]] = [set() for _ in items]
+        failed: Set[int] = set()
+        remaining = len(items)
+        finished = asyncio.Event()
+
+        def complete(index: int, name: str) -> None:
+            nonlocal remaining
+            done[index].add(name)
+            if len(done[index]) == len(self.stages):
+                remaining -= 1
+                if self.on_item_done:
+                    try:
+                        self.on_item_done(items[index])
+                    except Exception as e:
+                        print(f"on_item_done failed for an item: {e}")
+                if remaining == 0:
+                    finished.set()
+                return
+            for dependent in self._dependents[name]:
+                if all(dep in done[index] for dep in self.stages[dependent].depends_on):
+                    schedule(index, dependent)
+
+        def schedule(index: int, name: str) -> None:
+            stage = self.stages[name]
+            item = items[index]
+            try:
+                skip = index in failed or self._stopping() or (stage.needed is not None and not stage.needed(item))
+                priority = stage.priority(item) if stage.priority is not None and not skip else 0
+            except Exception as e:
+                print(f"Stage {name} could not be scheduled for an item: {e}")
+                failed.add(index)
+                skip = True
+            if skip:
+                complete(index, name)
+            else:
+                queues[name].put_nowait((-priority, next(arrival), index))
+
+        async def worker(stage: Stage[T]) -> None:
+            queue = queues[stage.name]
+            while True:
+                batch = [(await queue.get())[-1]]
+                while len(batch) < stage.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait()[-1])
+                if self._stopping():
+                    for index in batch:
+                        complete(index, stage.name)
+                    continue
+                try:
+                    await stage.run([items[index] for index in batch])
+                except Exception as e:
+                    print(f"Stage {stage.name} failed for {len(batch)} item(s): {e}")
+                    failed.update(batch)
+                for index in batch:
+                    complete(index, stage.name)
+
+        tasks = [
+            asyncio.create_task(worker(stage))
+            for stage in self.stages.values()
+            for _ in range(max(1, stage.workers))
+        ]
+        try:
+            for index in range(len(items)):
+                for name in self._roots:
+                    schedule(index, name)
+            await finished.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a call would exceed the total token budget."""
+
+
+class TokenBudget:
+    """Running token accounting with optional per-minute and total limits.
+
+    Usage comes from the ``usage`` block of each completion. The
+    per-minute limit throttles: callers wait until the last 60 seconds of
+    usage leaves room for their estimate. The total limit only applies
+    while a campaign is active (see ``start_campaign``): a call waits
+    while usage plus the estimates of calls still in flight has reached
+    it, and is refused once actual usage alone has.
+    """
+
+    def __init__(self, tokens_per_minute: Optional[int] = None):
+        self.tokens_per_minute = tokens_per_minute
+        self.total_limit: Optional[int] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self._active = False
+        self._reserved = 0  # estimates of calls between acquire and release
+        self._window: Deque[Tuple[float, int]] = deque()  # (monotonic time, tokens)
+        self._window_tokens = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def exhausted(self) -> bool:
+        return self._active and self.total_limit is not None and self.total_tokens >= self.total_limit
+
+    def start_campaign(self, total_limit: Optional[int] = None) -> None:
+        """Reset the totals and apply ``total_limit`` until end_campaign."""
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.total_limit = total_limit
+        self._active = True
+
+    def end_campaign(self) -> None:
+        """Stop enforcing the total limit; the totals stay readable."""
+        self._active = False
+
+    def _expire(self, now: float) -> None:
+        while self._window and self._window[0][0] <= now - 60:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    async def acquire(self, estimate: int) -> None:
+        """Wait until a call of about ``estimate`` tokens fits the budget.
+
+        The estimate is held until ``release`` so concurrent callers see
+        each other's calls; every acquire must be paired with a release.
+        """
+        if self.tokens_per_minute:
+            # A single call larger than the limit would otherwise wait forever
+            needed = min(estimate, self.tokens_per_minute)
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                in_use = self._window_tokens + self._reserved
+                if in_use + needed <= self.tokens_per_minute or in_use == 0:
+                    break
+                # Wait for the oldest usage to leave the window, or poll
+                # while only in-flight calls are holding the room
+                wait = self._window[0][0] + 60 - now if self._window else 0
+                await asyncio.sleep(max(wait, 0.05))
+        while self._active and self.total_limit is not None:
+            if self.exhausted:
+                raise TokenBudgetExceeded(f"token budget of {self.total_limit} used up")
+            if self._reserved == 0 or self.total_tokens + self._reserved < self.total_limit:
+                break
+            # Calls in flight may finish under their estimates and leave room
+            await asyncio.sleep(0.05)
+        self._reserved += estimate
+
+    def release(self, estimate: int) -> None:
+        """Drop the hold taken by ``acquire`` once the call has finished."""
+        self._reserved -= estimate
+
+    def record(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """Add the usage reported for one completion."""
+        tokens = prompt_tokens + completion_tokens
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.calls += 1
+        self._window.append((time.monotonic(), tokens))
+        self._window_tokens += tokens
+
+    def snapshot(self) -> Dict[str, Optional[int]]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "token_budget": self.total_limit,
+        }
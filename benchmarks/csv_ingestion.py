@@ -0,0 +1,99 @@
+"""Benchmark CSV lead ingestion on synthetic files.
+
+Compares the old row-by-row iterrows() path with CSVHandler.read_leads
+(validated and unvalidated).
+
+Usage:
+    python -m benchmarks.csv_ingestion --rows 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.models import Lead
+from app.services.csv_handler import CSVHandler, LEAD_COLUMNS
+
+
+TITLES = ["CEO", "VP of Sales", "Director of IT", "Engineer", "Marketing Manager", None]
+INDUSTRIES = ["Technology", "Healthcare", "Finance", "Retail", None]
+SIZES = ["1-10", "50-200", "500-1000", "5000+", None]
+
+
+def make_csv(path: str, rows: int, seed: int = 0) -> None:
+    """Write a synthetic leads CSV with some missing values."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, rows + 1)
+    df = pd.DataFrame({
+        "id": ids,
+        "name": [f"Lead {i}" for i in ids],
+        "email": [f"lead{i}@example{i % 97}.com" for i in ids],
+        "company": [f"Company {i % 5000}" for i in ids],
+        "job_title": rng.choice(np.array(TITLES, dtype=object), rows),
+        "industry": rng.choice(np.array(INDUSTRIES, dtype=object), rows),
+        "company_size": rng.choice(np.array(SIZES, dtype=object), rows),
+        "location": "Remote",
+        "persona": None,
+        "priority": None,
+        "priority_score": None,
+        "priority_reason": None,
+        "status": "new",
+        "email_draft": None,
+        "response_category": None,
+    })
+    df[LEAD_COLUMNS].to_csv(path, index=False)
+
+
+def legacy_read_leads(path: str):
+    """The original iterrows() implementation, kept for comparison."""
+    df = pd.read_csv(path)
+    leads = []
+    for _, row in df.iterrows():
+        cleaned = {}
+        for k, v in row.to_dict().items():
+            if pd.isna(v) or v == "" or v == "nan":
+                cleaned[k] = None
+            else:
+                cleaned[k] = v
+        leads.append(Lead(**cleaned))
+    return leads
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--skip-legacy-above", type=int, default=200_000,
+                        help="skip the slow legacy path for larger files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"leads_{rows}.csv")
+            make_csv(path, rows)
+
+            # A fresh handler per measurement, so none is served from the
+            # parsed snapshot a previous read left behind
+            results = {}
+            if rows <= args.skip_legacy_above:
+                results["legacy iterrows"] = timed(lambda: legacy_read_leads(path))
+            results["read_leads"] = timed(CSVHandler(path).read_leads)
+            results["read_leads(validate=False)"] = timed(lambda: CSVHandler(path).read_leads(validate=False))
+
+            print(f"\n{rows:,} rows")
+            baseline = results.get("legacy iterrows", (None,))[0]
+            for name, (seconds, count) in results.items():
+                speedup = f"  {baseline / seconds:5.1f}x" if baseline else ""
+                print(f"  {name:<28} {seconds:8.2f}s  ({count:,} leads){speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Local OpenAI-compatible chat-completions server for offline load tests.
+
+Point the app at it with LLM_BASE_URL=http://127.0.0.1:8765/v1/chat/completions.
+It has three modes:
+
+- synthetic: answers every call with a canned reply that fits the agents'
+  JSON schemas (or a short email for plain-text calls).
+- record: forwards each call to --upstream, with the caller's
+  Authorization header, and saves the reply under --dir.
+- replay: serves the saved replies, keyed by a hash of the request, and
+  answers 404 for requests that were never recorded.
+
+The synthetic and replay modes can also inject faults:
+- latency drawn from a distribution;
+- 429 responses with a Retry-After header;
+- malformed JSON replies.
+
+Every random choice is seeded from --seed, the request and how many
+times that request has been seen. A run therefore repeats exactly,
+however its calls interleave, while a retried call can still get a
+different outcome. GET /stats reports what was served.
+
+Usage:
+    python -m benchmarks.llm_standin --latency lognormal:0.3,0.5 --rate-429 0.05 --malformed-rate 0.1
+    python -m benchmarks.llm_standin --mode record --upstream https://api.groq.com/openai/v1/chat/completions
+    python -m benchmarks.llm_standin --mode replay --dir data/llm_recordings
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+LEAD_ID_PATTERN = re.compile(r"Lead ID: (\d+)")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Build a latency sampler (seconds) from "name:params".
+
+    fixed:S, uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA.
+    """
+    name, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if name == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "exponential" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if name == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise argparse.ArgumentTypeError(f"invalid latency spec: {spec}")
+
+
+def request_key(body: dict) -> str:
+    """Hash the parts of a request that determine the completion."""
+    raw = json.dumps(
+        [body.get("model"), body.get("messages"), body.get("temperature"),
+         body.get("max_tokens"), body.get("response_format")],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def wants_json(body: dict) -> bool:
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return True
+    return any("JSON" in str(m.get("content", "")) for m in body.get("messages", []) if m.get("role") == "system")
+
+
+def synthetic_content(body: dict, rng: random.Random) -> str:
+    """A reply that validates against every agent's reply schema."""
+    messages = body.get("messages", [])
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    if not wants_json(body):
+        return "Hi there,\n\nI noticed your team is growing and thought our product could help. Open to a quick call next week?\n\nBest,\nAlex"
+
+    def score() -> dict:
+        value = rng.randint(1, 100)
+        priority = "high" if value >= 70 else "medium" if value >= 40 else "low"
+        return {"priority": priority, "priority_score": value, "priority_reason": "Synthetic score"}
+
+    lead_ids = [int(i) for i in LEAD_ID_PATTERN.findall(prompt)]
+    if lead_ids:
+        return json.dumps({"scores": [dict(id=i, **score()) for i in lead_ids]})
+    return json.dumps({
+        **score(),
+        "persona": "Synthetic persona: a busy decision maker looking to cut costs.",
+        "enriched_industry": "Technology",
+        "enriched_company_size": "100-500",
+        "category": rng.choice(["interested", "not_interested", "needs_more_info"]),
+        "confidence": rng.randint(50, 100),
+        "summary": "Synthetic classification",
+    })
+
+
+def malform(content: str, rng: random.Random) -> str:
+    """Break a JSON reply the way models do: truncation or a missing brace."""
+    if rng.random() < 0.5:
+        return content[: max(1, len(content) // 2)]
+    return content.rstrip("}")
+
+
+def completion(body: dict, content: str) -> dict:
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+    prompt_tokens, completion_tokens = prompt_chars // 4 + 1, len(content) // 4 + 1
+    return {
+        "id": f"chatcmpl-{request_key(body)[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "standin"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def create_app(
+    mode: str = "synthetic",
+    directory: str = "data/llm_recordings",
+    upstream: Optional[str] = None,
+    latency: Callable[[random.Random], float] = lambda rng: 0.0,
+    rate_429: float = 0.0,
+    retry_after: float = 1.0,
+    malformed_rate: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    app = FastAPI(title="LLM stand-in")
+    stats: Counter = Counter()
+    seen: Counter = Counter()  # request key -> times received
+    client = httpx.AsyncClient(timeout=60.0) if mode == "record" else None
+    if mode == "record":
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(key: str) -> str:
+        return os.path.join(directory, f"{key}.json")
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        key = request_key(body)
+        stats["requests"] += 1
+        rng = random.Random(f"{seed}:{key}:{seen[key]}")  # latency and faults
+        seen[key] += 1
+
+        if mode == "record":
+            headers = {"Authorization": request.headers.get("authorization", "")}
+            response = await client.post(upstream, json=body, headers=headers)
+            if response.status_code == 200:
+                with open(path_for(key), "w", encoding="utf-8") as f:
+                    json.dump({"request": body, "response": response.json()}, f, ensure_ascii=False)
+                stats["recorded"] += 1
+            else:
+                stats[f"upstream_{response.status_code}"] += 1
+            passthrough = {
+                k: v for k, v in response.headers.items()
+                if k.lower() == "retry-after" or k.lower().startswith("x-ratelimit-")
+            }
+            return JSONResponse(response.json(), status_code=response.status_code, headers=passthrough)
+
+        await asyncio.sleep(max(0.0, latency(rng)))
+        if rng.random() < rate_429:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after": str(retry_after)},
+            )
+
+        if mode == "replay":
+            try:
+                with open(path_for(key), encoding="utf-8") as f:
+                    data = json.load(f)["response"]
+            except FileNotFoundError:
+                stats["replay_misses"] += 1
+                return JSONResponse({"error": {"message": f"no recording for request {key}"}}, status_code=404)
+            stats["replay_hits"] += 1
+        else:
+            # Seeded by the request so the same prompt always gets the same reply
+            content = synthetic_content(body, random.Random(f"{seed}:{key}"))
+            data = completion(body, content)
+
+        if malformed_rate and wants_json(body) and rng.random() < malformed_rate:
+            stats["malformed"] += 1
+            message = data["choices"][0]["message"]
+            message["content"] = malform(message["content"], rng)
+        stats["ok"] += 1
+        return data
+
+    # Groq-style and OpenAI-style paths
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        if client is not None:
+            await client.aclose()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default="synthetic")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dir", default="data/llm_recordings", help="where recordings are saved and replayed from")
+    parser.add_argument("--upstream", default="https://api.groq.com/openai/v1/chat/completions",
+                        help="endpoint forwarded to in record mode")
+    parser.add_argument("--latency", type=parse_latency, default=parse_latency("fixed:0"),
+                        help="fixed:S, uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="fraction of JSON replies that are truncated or broken")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(
+        mode=args.mode,
+        directory=args.dir,
+        upstream=args.upstream,
+        latency=args.latency,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
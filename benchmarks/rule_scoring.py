@@ -0,0 +1,41 @@
+"""Benchmark the rule-based pre-scorer on synthetic leads.
+
+Reports scoring time and how many leads would be escalated to the LLM.
+
+Usage:
+    python -m benchmarks.rule_scoring --rows 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from app.agents.rule_scorer import rule_scorer
+from benchmarks.csv_ingestion import make_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"leads_{rows}.csv")
+            make_csv(path, rows)
+            df = pd.read_csv(path)
+
+            start = time.perf_counter()
+            result = rule_scorer.score_frame(df)
+            seconds = time.perf_counter() - start
+
+            escalated = int(result["escalate"].sum())
+            print(f"\n{rows:,} rows scored in {seconds:.2f}s")
+            print(f"  escalated to LLM: {escalated:,} ({escalated / rows * 100:.1f}%)")
+            print(f"  priority split:   {result['priority'].value_counts().to_dict()}")
+
+
+if __name__ == "__main__":
+    main()